@@ -0,0 +1,69 @@
+from timeline import Animation, Key, ease_in, ease_in_out, ease_out, linear, step, steps
+
+# Where a pellet enters the screen and how fast (pixels per 0.1 s)
+START_X, START_Y = 10, 32
+VELOCITY_X, VELOCITY_Y = 2, 4
+
+# Bounce and final arc into the bunny's mouth
+BOUNCE_HEIGHT = -20
+BOUNCE_DISTANCE = 40
+BOUNCE_DURATION = 1.5
+ARC_DURATION = 1.0
+ARC_TARGET_Y = 39
+
+# Bunny sprite frame, flipping every half second while awake
+BUNNY_BOB = Animation("bunny_bob", 1.0, loop=True, frame=[
+    Key(0.0, 0),
+    Key(0.5, 1, step),
+    Key(1.0, 0, step),
+])
+
+# Faster breathing while asleep
+BUNNY_DOZE = Animation("bunny_doze", 0.5, loop=True, frame=[
+    Key(0.0, 0),
+    Key(0.25, 1, step),
+    Key(0.5, 0, step),
+])
+
+# ZZZs scrolling 2 px every 0.25 s, right to left across a 128 px screen
+ZZZ_SCROLL = Animation("zzz_scroll", 16.0, loop=True, scroll=[
+    Key(0.0, 0),
+    Key(16.0, 128, steps(64)),
+])
+
+# Reactions, played once over the current pose; y and x offset the bunny
+PET_HOP = Animation("pet_hop", 0.5, y=[
+    Key(0.0, 0),
+    Key(0.2, -4, ease_out),
+    Key(0.5, 0, ease_in),
+])
+
+PLAY_WIGGLE = Animation("play_wiggle", 0.6, x=[
+    Key(0.0, 0),
+    Key(0.15, -3, ease_out),
+    Key(0.45, 3, ease_in_out),
+    Key(0.6, 0, ease_in),
+])
+
+BUNNY_ANIMATIONS = (BUNNY_BOB, BUNNY_DOZE, ZZZ_SCROLL, PET_HOP, PLAY_WIGGLE)
+
+
+def pellet_flight(width, height):
+    """A pellet's drop to the floor, bounce and arc into the bunny's mouth"""
+    floor = height - 6
+    drop = (floor - START_Y) / (VELOCITY_Y / 0.1)
+    landing_x = START_X + VELOCITY_X / 0.1 * drop
+    bounce = drop + BOUNCE_DURATION
+    # The pellet vanishes on the tick the arc completes
+    arrive = bounce + ARC_DURATION
+    return Animation("pellet_flight", arrive, x=[
+        Key(0.0, START_X),
+        Key(drop, landing_x, linear),
+        Key(bounce, landing_x + BOUNCE_DISTANCE, linear),
+        Key(arrive, width // 2, ease_out),
+    ], y=[
+        Key(0.0, START_Y),
+        Key(drop, floor, linear),
+        Key(bounce, floor + BOUNCE_HEIGHT, ease_out),
+        Key(arrive, ARC_TARGET_Y, ease_in_out),
+    ])
@@ -0,0 +1,153 @@
+import asyncio
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncRuntime:
+    """Run a DigitalPet as asyncio tasks instead of the threaded GameLoop
+
+    Input, stat decay, random events, animation and display refresh are
+    separate tasks on one event loop, so they never race on the pet's state.
+    Blocking I2C transfers go to a single-worker executor, which keeps the
+    bus serialized while the loop stays free for other work (network
+    features can simply add their own tasks). stop() cancels everything and
+    then runs the pet's normal cleanup.
+    """
+
+    def __init__(self, pet):
+        self.pet = pet
+        self.dt = 1.0 / pet.TICK_RATE
+        self.render_period = 1.0 / pet.RENDER_FPS
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="display")
+        self.tasks = []
+        self.loop = None
+        self.input_ready = None
+        self.frame_due = None
+        # Take over display pacing from the pet's GameLoop
+        pet.refresh = self
+
+        # Runtime accounting
+        self.ticks = 0
+        self.frames = 0
+        self.late_frames = 0
+        self.skipped = 0
+
+    def set_render_fps(self, fps):
+        """Change the refresh rate; speeding up wakes the display task"""
+        faster = 1.0 / fps < self.render_period
+        self.render_period = 1.0 / fps
+        if faster:
+            self.request_render()
+
+    def request_render(self):
+        """Refresh the display now rather than at the next period"""
+        if self.frame_due is not None:
+            self.frame_due.set()
+
+    async def periodic(self, interval, step):
+        """Call step(interval) on a drift-free schedule"""
+        next_run = self.loop.time()
+        while True:
+            step(interval)
+            next_run += interval
+            delay = next_run - self.loop.time()
+            if delay < 0:
+                # Fell a whole period behind, resync instead of bursting
+                next_run = self.loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def tick_stats(self, dt):
+        if not self.pet.running:
+            self.stop()
+            return
+        self.pet.check_sleep()
+        store = self.pet.store
+        if store is not None and store.snapshot_due():
+            store.snapshot(self.pet.save_state())
+        self.ticks += 1
+
+    def tick_events(self, dt):
+        self.pet.check_random_events(dt)
+
+    def tick_animation(self, dt):
+        self.pet.animate(dt)
+        if not self.pet.is_sleeping:
+            self.pet.step_pellet(dt)
+        self.pet.adapt_refresh()
+
+    async def handle_input(self):
+        """Wake on every button edge and handle the queued presses"""
+        while True:
+            await self.input_ready.wait()
+            self.input_ready.clear()
+            self.pet.handle_buttons()
+
+    async def refresh_display(self):
+        """Render on the loop, transfer in the executor"""
+        next_frame = self.loop.time()
+        while True:
+            self.frame_due.clear()
+            self.pet.render_frame()
+            frame = self.pet.canvas.frame()
+            repainted = self.pet.scene.last_damage > 0
+            if repainted and self.pet.capture is not None:
+                self.pet.capture.add(self.pet.clock(), frame)
+            if (not repainted and self.pet.display.valid) or self.pet.display.unchanged(frame):
+                # Nothing new on screen, skip the executor round trip
+                self.skipped += 1
+            else:
+                await self.loop.run_in_executor(self.executor, self.pet.display.show_frame, frame)
+            self.frames += 1
+            next_frame += self.render_period
+            delay = next_frame - self.loop.time()
+            if delay < 0:
+                self.late_frames += 1
+                next_frame = self.loop.time()
+                delay = 0
+            try:
+                await asyncio.wait_for(self.frame_due.wait(), delay)
+                # Out-of-schedule frame, restart the period from here
+                next_frame = self.loop.time()
+            except asyncio.TimeoutError:
+                pass
+
+    async def main(self):
+        self.loop = asyncio.get_running_loop()
+        self.input_ready = asyncio.Event()
+        self.frame_due = asyncio.Event()
+        self.pet.buttons.notify = lambda: self.loop.call_soon_threadsafe(self.input_ready.set)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            self.loop.add_signal_handler(sig, self.stop)
+
+        self.tasks = [
+            asyncio.create_task(self.handle_input(), name="input"),
+            asyncio.create_task(self.periodic(self.dt, self.tick_stats), name="stats"),
+            asyncio.create_task(self.periodic(self.dt, self.tick_events), name="events"),
+            asyncio.create_task(self.periodic(self.dt, self.tick_animation), name="animation"),
+            asyncio.create_task(self.refresh_display(), name="display"),
+        ]
+        try:
+            await asyncio.gather(*self.tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.pet.buttons.notify = None
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                self.loop.remove_signal_handler(sig)
+
+    def stop(self):
+        """Cancel every task; run() then cleans up"""
+        for task in self.tasks:
+            task.cancel()
+
+    def run(self):
+        print("Digital Pet is running on asyncio! Press Ctrl+C to exit")
+        try:
+            asyncio.run(self.main())
+        finally:
+            # Let an in-flight transfer finish before the panel is cleared
+            self.executor.shutdown(wait=True)
+            print(f"\nRuntime: {self.ticks} ticks, {self.frames} frames, "
+                  f"{self.late_frames} late frames, {self.skipped} unchanged frames skipped")
+            self.pet.cleanup()
@@ -0,0 +1,288 @@
+"""Benchmark DigitalPet against the simulated display and GPIO
+
+Runs scripted scenarios through the real main loop in real time and reports
+frame rate, draw vs transfer frame time percentiles, I2C bytes per frame,
+press-to-first-changed-frame latency and main loop wake-up jitter as JSON.
+Pass --baseline to compare with an earlier result and exit non-zero on a
+regression. With --display-process the transfers happen in the child, so
+transfer times and press latency are not measured. Main loop wake-ups,
+context switches and CPU use per second compare --tickless with the
+default of waking every tick.
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import resource
+import sys
+import threading
+import time
+from functools import partial
+
+import numpy as np
+
+from core import DigitalPet
+from display_process import DisplayProcess
+from hardware import SimulatedSSD1306, FakeGPIO
+
+FEED, PET, PLAY = 17, 27, 22
+
+# The first frame is always a full 1 KB push, keep it out of the statistics
+WARMUP_FRAMES = 1
+
+
+def idle_awake(pet, duration):
+    """Awake and untouched"""
+    return []
+
+
+def sleeping(pet, duration):
+    """Asleep with the ZZZ strip scrolling"""
+    pet.last_interaction = time.time() - pet.SLEEP_TIMEOUT - 1
+    pet.is_sleeping = True
+    return []
+
+
+def feeding(pet, duration):
+    """FEED pressed every 0.8 s so a pellet is always in flight"""
+    return [(0.1 + i * 0.8, FEED) for i in range(int(duration / 0.8))]
+
+
+def pellet_storm(pet, duration):
+    """FEED every 60 ms, keeping dozens of pellets in flight"""
+    return [(0.1 + i * 0.06, FEED) for i in range(int(duration / 0.06))]
+
+
+def button_mashing(pet, duration):
+    """A press every 60 ms cycling through all three buttons"""
+    pins = (FEED, PET, PLAY)
+    return [(0.1 + i * 0.06, pins[i % 3]) for i in range(int(duration / 0.06))]
+
+
+SCENARIOS = {
+    "idle_awake": idle_awake,
+    "sleeping": sleeping,
+    "feeding": feeding,
+    "pellet_storm": pellet_storm,
+    "button_mashing": button_mashing,
+}
+
+
+def percentiles(samples):
+    """p50/p99/max in milliseconds"""
+    if not samples:
+        return {"p50": None, "p99": None, "max": None}
+    values = np.asarray(samples) * 1000
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def run_scenario(name, duration, seed=0, pipelined=True, renderer="packed",
+                 display_process=False, spin=False, tickless=False):
+    """Run one scenario and return its metrics"""
+    oled = SimulatedSSD1306(spin=spin)
+    gpio = FakeGPIO()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pet = DigitalPet(oled, gpio, pipelined=pipelined and not display_process,
+                         rng=random.Random(seed), renderer=renderer)
+    if display_process:
+        pet.pipeline = DisplayProcess(pet.display, partial(SimulatedSSD1306, spin=spin))
+    # Stats below the cap so every PET/PLAY press changes a label
+    pet.hunger = 50
+    pet.happiness = 50
+    script = SCENARIOS[name](pet, duration)
+    if tickless:
+        pet.enable_tickless()
+
+    draw_times = []
+    transfer_times = []
+    frame_bytes = []
+    pending = []      # timestamps of handled presses not yet on screen
+    # The main loop adds presses while the writer thread takes them
+    pending_lock = threading.Lock()
+    latencies = []
+    wake_lateness = []  # how long past its deadline each wait returned
+
+    poll = pet.buttons.poll
+    wait = pet.loop.wait
+    show_frame = pet.display.show_frame
+    update_display = pet.update_display
+
+    def timed_poll():
+        events = poll()
+        if events:
+            with pending_lock:
+                pending.extend(event.timestamp for event in events)
+        return events
+
+    def timed_wait(timeout):
+        deadline = time.perf_counter() + timeout
+        wait(timeout)
+        late = time.perf_counter() - deadline
+        # Waits cut short by a button edge are on time by design
+        if late > 0:
+            wake_lateness.append(late)
+
+    def timed_show_frame(frame, changed=True):
+        # Runs on the writer thread when the pipeline is enabled
+        start = time.perf_counter()
+        sent = show_frame(frame, changed)
+        transfer_times.append(time.perf_counter() - start)
+        frame_bytes.append(sent)
+        if sent and pending:
+            now = time.monotonic()
+            with pending_lock:
+                latencies.extend(now - stamp for stamp in pending)
+                pending.clear()
+        return sent
+
+    def timed_update_display():
+        start = time.perf_counter()
+        update_display()
+        elapsed = time.perf_counter() - start
+        if pet.pipeline is None:
+            # The transfer happened inline, keep only the drawing
+            elapsed -= transfer_times[-1]
+        draw_times.append(elapsed)
+
+    pet.buttons.poll = timed_poll
+    pet.loop.wait = timed_wait
+    pet.display.show_frame = timed_show_frame
+    pet.update_display = timed_update_display
+
+    threading.Timer(duration, lambda: setattr(pet, "running", False)).start()
+    gpio.play(script)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = time.process_time()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pet.run()
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+        switches = sum(getattr(resource.getrusage(resource.RUSAGE_SELF), field)
+                       - getattr(usage, field) for field in ("ru_nvcsw", "ru_nivcsw"))
+        pet.cleanup()
+
+    frames = len(draw_times)
+    draw_times = draw_times[WARMUP_FRAMES:]
+    transfer_times = transfer_times[WARMUP_FRAMES:]
+    steady_bytes = frame_bytes[WARMUP_FRAMES:]
+    transferred = len(frame_bytes)
+    if display_process:
+        # Only the child's totals are available
+        transferred = pet.pipeline.transferred
+        steady_bytes = [pet.pipeline.total_bytes / transferred] if transferred else []
+    return {
+        "duration_s": round(elapsed, 3),
+        "frames": frames,
+        "fps": round(frames / elapsed, 2),
+        "draw_ms": percentiles(draw_times),
+        "transfer_ms": percentiles(transfer_times),
+        "bytes_per_frame": {
+            "mean": round(float(np.mean(steady_bytes)), 1) if steady_bytes else 0,
+            "max": int(max(steady_bytes)) if steady_bytes else 0,
+        },
+        "damaged_px_per_frame": round(pet.scene.average_damage(), 1),
+        "presses": len(script),
+        "presses_bounced": gpio.bounced,
+        "presses_without_visible_change": len(pending),
+        "press_latency_ms": percentiles(latencies),
+        "pellets_spawned": pet.pellets.spawned,
+        "pellets_eaten": pet.pellets.eaten,
+        "frames_transferred": transferred,
+        "frames_dropped": pet.pipeline.dropped if pet.pipeline is not None else 0,
+        "frames_skipped": pet.display.skipped + (
+            pet.pipeline.skipped if pet.pipeline is not None else 0),
+        "loop_jitter_ms": percentiles(wake_lateness),
+        "late_frames": pet.loop.late_frames,
+        "dropped_ticks": pet.loop.dropped_ticks,
+        "wakeups_per_s": round(pet.loop.wakeups / elapsed, 2),
+        # Every thread in the process, the pipeline writer included
+        "context_switches_per_s": round(switches / elapsed, 1),
+        "cpu_percent": round(100 * cpu / elapsed, 2),
+    }
+
+
+def regressions(result, baseline, tolerance):
+    """List metrics that got worse than the baseline by more than tolerance"""
+    found = []
+    for name, current in result["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if old is None:
+            continue
+        checks = [
+            ("fps", current["fps"], old["fps"], False),
+            ("draw_ms.p99", current["draw_ms"]["p99"], old["draw_ms"]["p99"], True),
+            ("transfer_ms.p99", current["transfer_ms"]["p99"], old["transfer_ms"]["p99"], True),
+            ("bytes_per_frame.mean", current["bytes_per_frame"]["mean"],
+             old["bytes_per_frame"]["mean"], True),
+            ("press_latency_ms.p99", current["press_latency_ms"]["p99"],
+             old["press_latency_ms"]["p99"], True),
+        ]
+        for metric, new_value, old_value, lower_is_better in checks:
+            if new_value is None or old_value is None or old_value == 0:
+                continue
+            change = (new_value - old_value) / old_value
+            if (change > tolerance) if lower_is_better else (change < -tolerance):
+                found.append(f"{name}.{metric}: {old_value} -> {new_value}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (default: all)")
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="seconds per scenario")
+    parser.add_argument("--no-pipeline", action="store_true",
+                        help="transfer on the main loop instead of the writer thread")
+    parser.add_argument("--display-process", action="store_true",
+                        help="transfer from a child process over shared memory")
+    parser.add_argument("--bus-spin", action="store_true",
+                        help="simulated bus time holds the GIL, like a driver written in Python")
+    parser.add_argument("--tickless", action="store_true",
+                        help="block between visible changes while idle instead of every tick")
+    parser.add_argument("--renderer", choices=("packed", "pil"), default="packed",
+                        help="rendering path to benchmark")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative regression (default 0.2)")
+    args = parser.parse_args()
+
+    result = {
+        "python": sys.version.split()[0],
+        "pipelined": not args.no_pipeline,
+        "display_process": args.display_process,
+        "bus_spin": args.bus_spin,
+        "tickless": args.tickless,
+        "renderer": args.renderer,
+        "scenarios": {
+            name: run_scenario(name, args.duration, pipelined=not args.no_pipeline,
+                               renderer=args.renderer, display_process=args.display_process,
+                               spin=args.bus_spin, tickless=args.tickless)
+            for name in (args.scenario or SCENARIOS)
+        },
+    }
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(result, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
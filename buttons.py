@@ -0,0 +1,72 @@
+import queue
+import threading
+import time
+
+
+class ButtonEvent:
+    """A single timestamped button press"""
+
+    __slots__ = ("name", "pin", "timestamp")
+
+    def __init__(self, name, pin, timestamp):
+        self.name = name
+        self.pin = pin
+        self.timestamp = timestamp
+
+
+class ButtonInput:
+    """Edge-detected buttons feeding a thread-safe queue of press events"""
+
+    def __init__(self, gpio, buttons, bouncetime=50):
+        self.gpio = gpio
+        self.pins = {pin: name for name, pin in buttons.items()}
+        self.events = queue.SimpleQueue()
+        self.pending = threading.Event()
+
+        # Press accounting
+        self.received = 0
+        self.handled = 0
+        self.max_latency = 0.0
+
+        # Optional extra wake-up hook, called from the GPIO callback thread
+        self.notify = None
+
+        for pin in self.pins:
+            gpio.setup(pin, gpio.IN, pull_up_down=gpio.PUD_DOWN)
+            gpio.add_event_detect(pin, gpio.RISING, callback=self.on_edge, bouncetime=bouncetime)
+
+    def on_edge(self, pin):
+        """GPIO callback thread: queue the press and return immediately"""
+        self.received += 1
+        self.events.put(ButtonEvent(self.pins[pin], pin, time.monotonic()))
+        self.pending.set()
+        if self.notify is not None:
+            self.notify()
+
+    def wait(self, timeout):
+        """Sleep up to timeout seconds, waking early when a press arrives"""
+        self.pending.wait(timeout)
+
+    def poll(self):
+        """Drain every press queued since the last call, never blocking"""
+        self.pending.clear()
+        if self.events.empty():
+            # The usual case, answered without building a list
+            return ()
+        events = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            latency = time.monotonic() - event.timestamp
+            if latency > self.max_latency:
+                self.max_latency = latency
+            events.append(event)
+        self.handled += len(events)
+        return events
+
+    def close(self):
+        """Stop edge detection on all buttons"""
+        for pin in self.pins:
+            self.gpio.remove_event_detect(pin)
@@ -0,0 +1,396 @@
+"""Capture every frame sent to the OLED and decode captures to PNG or GIF
+
+While the pet runs, update_display hands each changed frame to a FrameCapture,
+which only copies it into a ring of preallocated slots; a background thread
+XORs it against the previous frame and run-length encodes the difference,
+which for a bunny flipping sprites is a few dozen bytes. Every
+KEYFRAME_INTERVAL seconds a full keyframe starts a new zlib-compressed
+segment and its offset goes to a sidecar .idx file, so decoding from any
+time only replays the deltas since the keyframe before it. Repeating sprite
+flips make near-identical deltas, so a day's capture is a few megabytes.
+
+Run on a capture file, prints a summary as JSON, or writes the frames from
+--start on as numbered PNGs and/or an animated GIF.
+"""
+import argparse
+import bisect
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+from framebuffer import unpack_image
+
+MAGIC = b"DPFC"
+VERSION = 1
+
+# magic, version, width, height, start time
+HEADER = struct.Struct("<4sBHHd")
+# kind, milliseconds since the start, payload length
+RECORD = struct.Struct("<BIH")
+# milliseconds since the start, file offset of a keyframe record
+INDEX = struct.Struct("<IQ")
+
+KEY = 1
+DELTA = 2
+
+# Timestamps are 32-bit milliseconds, about 49 days
+MAX_MS = 2 ** 32 - 1
+
+# Seconds between keyframes, so a seek decodes at most this much
+KEYFRAME_INTERVAL = 60.0
+# Seconds of capture a crash can lose
+FLUSH_INTERVAL = 5.0
+# Compressed bytes decompressed at a time when reading
+READ_CHUNK = 65536
+# Frames the writer thread may fall behind before new ones are dropped
+SLOTS = 64
+
+# Payload tokens: 0x00-0x7F skip 1-128 unchanged bytes,
+# 0x80-0xFF are followed by 1-128 bytes to XOR in
+MAX_RUN = 128
+LITERAL = 0x80
+# Unchanged gaps this short are cheaper sent as literal bytes
+MERGE_GAP = 2
+
+# Longest a GIF frame is held, so idle hours play back in seconds
+MAX_GIF_HOLD = 2.0
+
+
+def encode(delta):
+    """Run-length encode a flat XOR delta"""
+    size = len(delta)
+    changed = delta != 0
+    edges = (np.flatnonzero(changed[1:] != changed[:-1]) + 1).tolist()
+    out = bytearray()
+    literal_from = None
+    start = 0
+    for end in edges + [size]:
+        if changed[start] or (literal_from is not None and end - start <= MERGE_GAP and end < size):
+            if literal_from is None:
+                literal_from = start
+        else:
+            if literal_from is not None:
+                emit_literal(out, delta, literal_from, start)
+                literal_from = None
+            for run in range(start, end, MAX_RUN):
+                out.append(min(MAX_RUN, end - run) - 1)
+        start = end
+    if literal_from is not None:
+        emit_literal(out, delta, literal_from, size)
+    return out
+
+
+def emit_literal(out, delta, start, end):
+    for run in range(start, end, MAX_RUN):
+        chunk = delta[run:min(end, run + MAX_RUN)]
+        out.append(LITERAL + len(chunk) - 1)
+        out += chunk.tobytes()
+
+
+def decode(data, offset, length, frame):
+    """XOR an encoded delta into a flat frame in place"""
+    position = 0
+    end = offset + length
+    while offset < end:
+        token = data[offset]
+        offset += 1
+        if token < LITERAL:
+            position += token + 1
+            continue
+        count = token - LITERAL + 1
+        frame[position:position + count] ^= np.frombuffer(data, np.uint8, count, offset)
+        position += count
+        offset += count
+
+
+class FrameCapture:
+    """Record every frame passed to add() to a capture file
+
+    add() is the only call on the pet's thread and copies the frame into a
+    free slot; encoding, compression and writing happen on the capture
+    thread. When that thread falls SLOTS frames behind, new frames are
+    dropped rather than waited for, and the next one written is simply a
+    larger delta.
+    """
+
+    def __init__(self, path, width, height, start):
+        self.path = path
+        self.start = start
+        self.file = open(path, "wb")
+        self.index = open(path + ".idx", "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, width, height, start))
+        self.offset = HEADER.size
+
+        shape = (height // 8, width)
+        self.slots = np.zeros((SLOTS,) + shape, dtype=np.uint8)
+        self.head = 0
+        self.queue = queue.SimpleQueue()
+        # Writer thread state
+        self.previous = np.zeros(width * height // 8, dtype=np.uint8)
+        self.delta = np.zeros_like(self.previous)
+        self.stream = None
+        self.last_ms = 0
+        self.last_key = None
+        self.last_flush = 0
+
+        # Frame accounting
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.keyframes = 0
+        self.unchanged = 0
+
+        self.thread = threading.Thread(target=self.run, name="capture", daemon=True)
+        self.thread.start()
+
+    def add(self, timestamp, frame):
+        """Pet thread: queue a copy of a frame shown at timestamp"""
+        # The slot the writer is on and every queued one are off limits
+        if self.queue.qsize() >= SLOTS - 1:
+            self.dropped += 1
+            return
+        np.copyto(self.slots[self.head], frame)
+        self.queue.put((self.head, timestamp))
+        self.head = (self.head + 1) % SLOTS
+        self.captured += 1
+
+    def run(self):
+        """Capture thread: encode and write queued frames until closed"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            slot, timestamp = item
+            # Wall clock steps backwards are written as no time passing
+            ms = max(self.last_ms, round((timestamp - self.start) * 1000))
+            if ms > MAX_MS:
+                print(f"Capture {self.path} is full, no longer recording")
+                break
+            self.write(ms, self.slots[slot].reshape(-1))
+        if self.stream is not None:
+            self.emit(self.stream.flush())
+        self.file.flush()
+        self.index.flush()
+
+    def emit(self, data):
+        self.file.write(data)
+        self.offset += len(data)
+
+    def write(self, ms, frame):
+        np.bitwise_xor(frame, self.previous, out=self.delta)
+        if self.last_key is None or ms - self.last_key >= KEYFRAME_INTERVAL * 1000:
+            # A keyframe starts a new compressed segment, decodable on its own
+            if self.stream is not None:
+                self.emit(self.stream.flush())
+            self.stream = zlib.compressobj()
+            self.index.write(INDEX.pack(ms, self.offset))
+            kind = KEY
+            payload = encode(frame)
+            self.last_key = ms
+            self.keyframes += 1
+        elif self.delta.any():
+            kind = DELTA
+            payload = encode(self.delta)
+        else:
+            self.unchanged += 1
+            return
+        np.copyto(self.previous, frame)
+        self.emit(self.stream.compress(RECORD.pack(kind, ms, len(payload))))
+        self.emit(self.stream.compress(payload))
+        self.last_ms = ms
+        self.written += 1
+        if ms - self.last_flush >= FLUSH_INTERVAL * 1000:
+            # Everything so far becomes decodable; data before index, so
+            # an entry never points past the data
+            self.emit(self.stream.flush(zlib.Z_SYNC_FLUSH))
+            self.file.flush()
+            self.index.flush()
+            self.last_flush = ms
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        self.index.close()
+        print(f"Captured {self.captured} frames ({self.dropped} dropped) to {self.path}, "
+              f"{self.offset} bytes, {self.offset / max(1, self.written):.1f} bytes/frame")
+
+
+class Capture:
+    """A capture file read back from disk, with its seek index"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        if len(self.data) < HEADER.size or not self.data.startswith(MAGIC):
+            raise ValueError(f"{path} is not a frame capture")
+        _, version, self.width, self.height, self.start = HEADER.unpack_from(self.data)
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported version {version}")
+        self.keys = []     # keyframe milliseconds
+        self.offsets = []  # file offsets of the segments they start
+        if not self.load_index(path + ".idx"):
+            self.scan()
+
+    def load_index(self, path):
+        """Use the sidecar index, as far as it agrees with the data"""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return False
+        for position in range(0, len(data) - INDEX.size + 1, INDEX.size):
+            ms, offset = INDEX.unpack_from(data, position)
+            if offset >= len(self.data) or (self.offsets and offset <= self.offsets[-1]):
+                break
+            self.keys.append(ms)
+            self.offsets.append(offset)
+        return bool(self.keys)
+
+    def scan(self):
+        """Rebuild the index from the segments, e.g. when the .idx file is lost"""
+        for offset, raw in self.segments(HEADER.size):
+            if len(raw) >= RECORD.size:
+                self.keys.append(RECORD.unpack_from(raw)[1])
+                self.offsets.append(offset)
+
+    def segments(self, offset):
+        """(offset, decompressed records) for each segment from offset on"""
+        view = memoryview(self.data)
+        while offset < len(self.data):
+            stream = zlib.decompressobj()
+            parts = []
+            position = offset
+            while not stream.eof and position < len(self.data):
+                parts.append(stream.decompress(view[position:position + READ_CHUNK]))
+                position += READ_CHUNK
+            yield offset, b"".join(parts)
+            if not stream.eof:
+                # Cut short by a crash, decoded up to the last flush
+                return
+            offset = min(position, len(self.data)) - len(stream.unused_data)
+
+    def records(self, offset):
+        """(kind, ms, records, payload offset, payload length) from offset on"""
+        for _, raw in self.segments(offset):
+            position = 0
+            while position + RECORD.size <= len(raw):
+                kind, ms, length = RECORD.unpack_from(raw, position)
+                position += RECORD.size
+                if position + length > len(raw):
+                    return
+                yield kind, ms, raw, position, length
+                position += length
+
+    def frames(self, start=0, end=None):
+        """(ms, frame) for the frame on screen at start and every one after
+
+        start and end are milliseconds since the capture started; the frame
+        is the same pages x width array every time, updated in place.
+        """
+        frame = np.zeros((self.height // 8, self.width), dtype=np.uint8)
+        flat = frame.reshape(-1)
+        if not self.offsets:
+            return
+        key = max(0, bisect.bisect_right(self.keys, start) - 1)
+        held = None
+        for kind, ms, raw, offset, length in self.records(self.offsets[key]):
+            if held is not None and ms > start:
+                yield held, frame
+                held = None
+            if end is not None and ms > end:
+                return
+            if kind == KEY:
+                flat[:] = 0
+            decode(raw, offset, length, flat)
+            if ms <= start:
+                held = ms
+            else:
+                yield ms, frame
+        if held is not None:
+            yield held, frame
+
+    def summary(self):
+        count = 0
+        last = 0
+        for _, ms, _, _, _ in self.records(HEADER.size):
+            count += 1
+            last = ms
+        return {
+            "start": datetime.fromtimestamp(self.start).isoformat(timespec="seconds"),
+            "duration_s": last / 1000,
+            "width": self.width,
+            "height": self.height,
+            "frames": count,
+            "keyframes": len(self.keys),
+            "bytes": len(self.data),
+            "bytes_per_frame": round(len(self.data) / count, 1) if count else None,
+        }
+
+
+def parse_time(text, start):
+    """Seconds into the capture, a Unix time or a local ISO date/time, as ms"""
+    try:
+        value = float(text)
+    except ValueError:
+        value = datetime.fromisoformat(text).timestamp()
+    if value >= start:
+        value -= start
+    return max(0, round(value * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="file written by core.py --capture")
+    parser.add_argument("--start", default="0",
+                        help="seconds into the capture, Unix time or ISO local time")
+    parser.add_argument("--duration", type=float, help="seconds to decode from --start")
+    parser.add_argument("--png", metavar="DIR", help="write each frame as a PNG here")
+    parser.add_argument("--gif", metavar="PATH", help="write the frames as an animated GIF")
+    parser.add_argument("--scale", type=int, default=2, help="pixel size in the output images")
+    args = parser.parse_args()
+
+    try:
+        capture = Capture(args.capture)
+        start = parse_time(args.start, capture.start)
+    except ValueError as error:
+        sys.exit(str(error))
+    if not (args.png or args.gif):
+        print(json.dumps(capture.summary(), indent=2))
+        return
+    end = None if args.duration is None else start + round(args.duration * 1000)
+    if args.png:
+        os.makedirs(args.png, exist_ok=True)
+
+    size = (capture.width * args.scale, capture.height * args.scale)
+    images = []
+    times = []
+    count = 0
+    for ms, frame in capture.frames(start, end):
+        image = unpack_image(frame).resize(size)
+        if args.png:
+            image.save(os.path.join(args.png, f"{count:06d}-{ms}ms.png"))
+        if args.gif:
+            images.append(image)
+            times.append(ms)
+        count += 1
+    if not count:
+        sys.exit("No frames in that range")
+    if args.gif:
+        holds = [min(MAX_GIF_HOLD * 1000, later - ms) for ms, later in zip(times, times[1:])]
+        images[0].save(args.gif, save_all=True, append_images=images[1:],
+                       duration=[max(20, hold) for hold in holds] + [MAX_GIF_HOLD * 1000], loop=0)
+    print(f"Decoded {count} frames from {start / 1000:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
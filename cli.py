@@ -0,0 +1,45 @@
+import argparse
+
+
+def parse_args(argv=None):
+    """Command line options shared by core.py and startup.py"""
+    parser = argparse.ArgumentParser(description="Digital pet on an SSD1306 OLED")
+    parser.add_argument("--simulate", action="store_true",
+                        help="run headless with a simulated display and GPIO")
+    parser.add_argument("--no-pipeline", action="store_true",
+                        help="transfer frames on the main loop instead of a writer thread")
+    parser.add_argument("--display-process", action="store_true",
+                        help="drive the display from a separate process over shared memory")
+    parser.add_argument("--asyncio", action="store_true",
+                        help="run input, stats, events, animation and display as asyncio tasks")
+    parser.add_argument("--tickless", action="store_true",
+                        help="while idle, block until the next visible change instead of ticking")
+    parser.add_argument("--renderer", choices=("packed", "pil"), default="packed",
+                        help="draw straight into SSD1306 page layout, or via PIL (slower)")
+    parser.add_argument("--state-dir", default="~/.digipet",
+                        help="where pet state is saved between runs")
+    parser.add_argument("--no-persist", action="store_true",
+                        help="start fresh and do not save state")
+    parser.add_argument("--metrics", action="store_true",
+                        help="time every main loop stage")
+    parser.add_argument("--metrics-file", help="write metrics JSON to this file")
+    parser.add_argument("--metrics-socket", help="serve metrics JSON on this Unix socket")
+    parser.add_argument("--metrics-interval", type=float, default=5.0,
+                        help="seconds between metrics file writes")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record the session for deterministic replay with session.py")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="capture every frame shown, for decoding with capture.py")
+    parser.add_argument("--profile-dir", metavar="DIR",
+                        help="profile on SIGUSR1, write collapsed stacks here on SIGUSR2")
+    parser.add_argument("--profile-rate", type=float, default=100.0,
+                        help="profiler samples per second, capped at 1%% overhead")
+    parser.add_argument("--seed", type=int, help="random seed for a recorded session")
+    args = parser.parse_args(argv)
+    if args.record and args.asyncio:
+        parser.error("--record needs the fixed-tick loop, not --asyncio")
+    if args.tickless and (args.asyncio or args.record):
+        parser.error("--tickless runs on the fixed-tick loop and is not replayable")
+    if args.display_process and args.asyncio:
+        parser.error("--display-process replaces the asyncio runtime's own transfers")
+    return args
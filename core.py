@@ -1,57 +1,95 @@
-import board
-import adafruit_ssd1306
-from PIL import Image, ImageDraw, ImageFont
-import RPi.GPIO as GPIO
+import math
 import time
 import random
-import threading
+from functools import partial
+from cli import parse_args
+from hardware import open_display, open_gpio
+from display import DeltaDisplay, FramePipeline
+from sprites import SpriteAtlas, ZZZ_TEXT
+from buttons import ButtonInput
+from scheduler import GameLoop
+from metrics import Metrics, MetricsExporter
+from pellets import PelletPool
+from timeline import Timeline
+from animations import BUNNY_ANIMATIONS, pellet_flight
+from persistence import PetState, StateStore
+from stats import LinearStat, event_rate
+from scene import Scene, SpriteWidget, PelletLayer
+from framebuffer import FrameBuffer, ImageCanvas
 
 class DigitalPet:
-    def __init__(self):
-        # Initialize I2C and OLED
-        i2c = board.I2C()
-        self.oled = adafruit_ssd1306.SSD1306_I2C(128, 64, i2c, addr=0x3C)
+    def __init__(self, oled=None, gpio=None, store=None, pipelined=True,
+                 clock=time.time, rng=None, renderer="packed", buttons=None):
+        # Display and GPIO backends (real hardware unless others are passed in)
+        self.oled = oled if oled is not None else open_display()
+        self.gpio = gpio if gpio is not None else open_gpio()
         
-        # Create blank image for drawing
-        self.image = Image.new("1", (self.oled.width, self.oled.height))
-        self.draw = ImageDraw.Draw(self.image)
+        # Wall clock and random source, injectable for deterministic replay
+        self.clock = clock
+        self.rng = rng if rng is not None else random.Random()
         
-        # Button setup
-        GPIO.setmode(GPIO.BCM)
-        self.FEED_BTN = 17
-        self.PET_BTN = 27
-        self.PLAY_BTN = 22
-        GPIO.setup(self.FEED_BTN, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
-        GPIO.setup(self.PET_BTN, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
-        GPIO.setup(self.PLAY_BTN, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
+        # Draw straight into SSD1306 page layout, or into a PIL image that is
+        # packed afterwards when the old path is asked for
+        if renderer == "pil":
+            self.canvas = ImageCanvas(self.oled.width, self.oled.height)
+        else:
+            self.canvas = FrameBuffer(self.oled.width, self.oled.height)
         
-        # Pet stats and state
-        self.hunger = 100
-        self.happiness = 100
-        self.is_sleeping = False
-        self.last_interaction = time.time()
-        self.animation_frame = 0
-        self.scroll_position = 0
-        self.last_update = time.time()
+        # Only the changed part of each frame goes over I2C, on its own
+        # writer thread unless pipelining is turned off
+        self.display = DeltaDisplay(self.oled)
+        self.pipeline = FramePipeline(self.display) if pipelined else None
         
-        # Pellet animation states
-        self.show_pellet = False
-        self.pellet_x = 10  # Starting x position
-        self.pellet_y = 32  # Start from middle height
-        self.pellet_velocity_y = 2  # Initial downward velocity
-        self.pellet_velocity_x = 1  # Horizontal velocity
-        self.pellet_state = "drop"  # States: "drop", "bounce", "arc"
-        self.bounce_start_x = 0
-        self.bounce_start_y = 0
-        self.bounce_time = 0
-        self.arc_start_time = 0
+        # Button setup (BCM pins, overridable when several pets share a Pi)
+        self.gpio.setmode(self.gpio.BCM)
+        pins = buttons or {}
+        self.FEED_BTN = pins.get("feed", 17)
+        self.PET_BTN = pins.get("pet", 27)
+        self.PLAY_BTN = pins.get("play", 22)
+        # Presses are edge-detected and queued, the main loop never polls pins
+        self.buttons = ButtonInput(self.gpio, {
+            "feed": self.FEED_BTN,
+            "pet": self.PET_BTN,
+            "play": self.PLAY_BTN,
+        })
+        
+        # Pet stats and state (hunger and happiness are set up below)
+        self.is_sleeping = False
+        self.last_interaction = self.clock()
         
         # Constants
         self.SLEEP_TIMEOUT = 120  # 2 minutes
         self.HUNGER_DECAY = 5     # per minute
         self.HAPPINESS_DECAY = 7   # per minute
+        self.RANDOM_EVENT_CHANCE = 0.01  # per 0.1 s of awake time
+        self.TICK_RATE = 10       # simulation steps per second
+        self.RENDER_FPS = 10      # display frames per second
+        self.IDLE_FPS = 1         # display frames per second when nothing moves
+        self.ACTIVE_HOLD = 2.0    # seconds of full frame rate after an interaction
+        self.PELLET_FOOD = 15     # hunger restored per pellet eaten
+        self.CATCHUP_GAP = 1.0    # seconds without a tick treated as downtime
         self.running = True
         
+        # Hunger and happiness decay in closed form from their last change,
+        # so ticks never touch them and downtime needs no replaying
+        now = self.clock()
+        self.hunger_stat = LinearStat(100, now, self.HUNGER_DECAY / 60.0)
+        self.happiness_stat = LinearStat(100, now, self.HAPPINESS_DECAY / 60.0)
+        self.last_event_check = now
+        # Ticks left until the next random event, drawn ahead when tickless
+        self.event_countdown = None
+        
+        # Every animation is sampled into per-tick tables here, once; a tick
+        # then only moves each running one along its table
+        self.timeline = Timeline(1.0 / self.TICK_RATE).load(
+            *BUNNY_ANIMATIONS, pellet_flight(self.oled.width, self.oled.height))
+        self.pose = None       # bunny_bob or bunny_doze, looping
+        self.zzz_scroll = None  # only while asleep
+        self.reaction = None   # one-shot hop or wiggle after a press
+        
+        # Pellets in flight, all playing the same flight clip
+        self.pellets = PelletPool(self.timeline.clips["pellet_flight"])
+        
         # Bunny ASCII frames
 #         self.bunny_normal = [
 #             """ (\_/)
@@ -126,33 +164,226 @@ class DigitalPet:
   ("|"|)"""
         ]
         
-        # Start animation thread
-        self.animation_thread = threading.Thread(target=self.animate, daemon=True)
-        self.animation_thread.start()
-
-    def animate(self):
-        """Animation loop running in separate thread"""
-        while self.running:
-            self.animation_frame = (self.animation_frame + 1) % 2
-            if self.is_sleeping:
-                self.scroll_position = (self.scroll_position + 2) % self.oled.width
-                time.sleep(0.25)
-            else:
-                time.sleep(0.5)
-
-    def update_stats(self):
-        """Update pet stats based on time passed"""
-        current_time = time.time()
-        minutes_passed = (current_time - self.last_update) / 60.0
+        # Rasterize all text once so the render path only blits bitmaps
+        self.sprites = SpriteAtlas().build(
+            self.bunny_normal + self.bunny_happy + self.bunny_sad + self.bunny_sleeping
+        )
         
-        hunger_loss = self.HUNGER_DECAY * minutes_passed
-        happiness_loss = self.HAPPINESS_DECAY * minutes_passed
+        # Retained widgets; each frame only the rectangles that changed get redrawn
+        self.scene = Scene(self.canvas)
+        self.hunger_label = self.scene.add(SpriteWidget())
+        self.happy_label = self.scene.add(SpriteWidget())
+        self.bunny = self.scene.add(SpriteWidget())
+        self.zzz = self.scene.add(SpriteWidget())
+        self.pellet_layer = self.scene.add(PelletLayer(self.pellets))
         
-        self.hunger = max(0, min(100, self.hunger - hunger_loss))
-        self.happiness = max(0, min(100, self.happiness - happiness_loss))
+        # One deterministic tick drives stats, animation and the pellets
+        self.loop = GameLoop(tick_rate=self.TICK_RATE, render_fps=self.RENDER_FPS,
+                             wait=self.buttons.wait)
+        # Whatever paces the display (the asyncio runtime swaps itself in)
+        self.refresh = self.loop
+        self.display_active = True
         
-        self.last_update = current_time
-    
+        # Optional per-stage timing (see enable_metrics)
+        self.metrics = None
+        self.exporter = None
+        
+        # Optional session recording (see session.Recorder)
+        self.recorder = None
+        
+        # Optional capture of every frame shown (see capture.FrameCapture)
+        self.capture = None
+        
+        # Optional signal-driven sampling profiler (see profiler.SamplingProfiler)
+        self.profiler = None
+        
+        # Pick up where the last run left off
+        self.store = store
+        if self.store is not None:
+            self.restore()
+            self.store.start()
+
+    @property
+    def hunger(self):
+        return self.hunger_stat.value_at(self.clock())
+
+    @hunger.setter
+    def hunger(self, value):
+        self.hunger_stat.set(self.clock(), value)
+
+    @property
+    def happiness(self):
+        return self.happiness_stat.value_at(self.clock())
+
+    @happiness.setter
+    def happiness(self, value):
+        self.happiness_stat.set(self.clock(), value)
+
+    def restore(self):
+        """Load the last saved state and catch up on the time spent off"""
+        state = self.store.load()
+        if state is None:
+            return
+        # Anchored at the save time, the decay since then comes for free
+        self.hunger_stat.set(state.timestamp, state.hunger)
+        self.happiness_stat.set(state.timestamp, state.happiness)
+        self.last_interaction = state.last_interaction
+        self.is_sleeping = state.is_sleeping
+        self.apply_expected_events(state.timestamp, self.clock())
+        print(f"Restored pet state in {self.store.load_time * 1000:.1f} ms")
+
+    def save_state(self):
+        """The persistent part of the pet, stamped with the current time"""
+        return PetState(self.clock(), self.hunger, self.happiness,
+                        self.last_interaction, self.is_sleeping)
+
+    def journal(self, event):
+        """Record a stat-changing event if persistence is enabled"""
+        if self.store is not None:
+            self.store.append(event, self.save_state())
+
+    def enable_metrics(self, path=None, socket_path=None, interval=5.0):
+        """Time every main loop stage and export the results"""
+        self.metrics = Metrics()
+        for stage in ("check_sleep", "handle_buttons",
+                      "check_random_events", "animate", "step_pellet", "update_display"):
+            setattr(self, stage, self.metrics.wrap(stage, getattr(self, stage)))
+        if path or socket_path:
+            self.exporter = MetricsExporter(self.status, path, socket_path, interval).start()
+
+    def enable_tickless(self):
+        """Block between the ticks that change something instead of waking for each"""
+        chance = 1 - (1 - self.RANDOM_EVENT_CHANCE) ** (self.loop.dt / 0.1)
+        self.event_countdown = self.draw_event_ticks(chance)
+        self.loop.quiet = self.quiet_ticks
+        self.loop.skip = self.skip_ticks
+
+    def quiet_ticks(self):
+        """How many upcoming ticks would change neither the state nor the screen"""
+        # Full frame rate (after a press, pellets in flight) ticks as usual
+        if self.display_active:
+            return 0
+        now = self.clock()
+        deadlines = []
+        ticks = self.timeline.quiet_ticks()
+        if not self.is_sleeping:
+            ticks = min(ticks, self.event_countdown - 1)
+            deadlines.append(self.last_interaction + self.SLEEP_TIMEOUT - now)
+            deadlines.append(self.next_visible_stat_change(now))
+        if self.store is not None:
+            deadlines.append(self.store.snapshot_delay())
+        for seconds in deadlines:
+            if seconds < math.inf:
+                # The tick at or just after the deadline must run
+                ticks = min(ticks, int(seconds / self.loop.dt) - 1)
+        return max(0, ticks)
+
+    def next_visible_stat_change(self, now):
+        """Seconds until a status value or the mood shown while awake changes"""
+        stats = (self.hunger_stat, self.happiness_stat)
+        # The labels show whole numbers
+        soonest = min(stat.time_below(now, math.floor(stat.value_at(now))) for stat in stats)
+        # Mood thresholds, assuming both stats keep decaying (which only
+        # brings the estimate forward)
+        average = sum(stat.value_at(now) for stat in stats) / 2
+        rate = sum(stat.rate for stat in stats if stat.value_at(now) > stat.low) / 2
+        below = [threshold for threshold in (75, 50, 25) if threshold < average]
+        if below and rate > 0:
+            soonest = min(soonest, (average - max(below)) / rate)
+        return soonest
+
+    def skip_ticks(self, count):
+        """Fast-forward count ticks that quiet_ticks() said change nothing"""
+        self.timeline.skip(count)
+        self.last_event_check += count * self.loop.dt
+        if not self.is_sleeping:
+            self.event_countdown -= count
+
+    def status(self):
+        """Current pet state plus loop, display and timing metrics"""
+        status = {
+            "hunger": round(self.hunger, 2),
+            "happiness": round(self.happiness, 2),
+            "is_sleeping": self.is_sleeping,
+            "mood": self.get_mood(),
+            "loop": {
+                "ticks": self.loop.ticks,
+                "frames": self.loop.frames,
+                "missed_deadlines": self.loop.missed_deadlines,
+                "late_frames": self.loop.late_frames,
+                "dropped_ticks": self.loop.dropped_ticks,
+                "skipped_ticks": self.loop.skipped_ticks,
+                "wakeups": self.loop.wakeups,
+            },
+            "display": {
+                "last_frame_bytes": self.display.last_frame_bytes,
+                "average_bytes": round(self.display.average_bytes(), 1),
+                "skipped": self.display.skipped,
+                "active": self.display_active,
+            },
+            "scene": {
+                "damaged_px": self.scene.last_damage,
+                "average_damaged_px": round(self.scene.average_damage(), 1),
+            },
+        }
+        if self.pipeline is not None:
+            status["pipeline"] = {
+                "rendered": self.pipeline.rendered,
+                "transferred": self.pipeline.transferred,
+                "dropped": self.pipeline.dropped,
+                "skipped": self.pipeline.skipped,
+            }
+        if self.metrics is not None:
+            status.update(self.metrics.snapshot())
+        return status
+
+    def tick(self, dt):
+        """Advance the simulation by one fixed timestep"""
+        self.check_sleep()
+        self.check_random_events(dt)
+        self.animate(dt)
+        if not self.is_sleeping:
+            self.step_pellet(dt)
+        self.adapt_refresh()
+        if self.store is not None and self.store.snapshot_due():
+            self.store.snapshot(self.save_state())
+
+    def animate(self, dt):
+        """Advance every running animation one tick (dt is fixed in the clips)"""
+        self.update_pose()
+        if self.timeline.step():
+            # Show the new frame on time even at the idle refresh rate
+            self.refresh.request_render()
+
+    def update_pose(self):
+        """Loop the awake or asleep animations, whichever matches the pet"""
+        if self.pose is not None and (self.zzz_scroll is not None) == self.is_sleeping:
+            return
+        if self.pose is not None:
+            # Falling asleep or waking up cuts any reaction short
+            self.timeline.stop(self.reaction)
+        self.timeline.stop(self.pose)
+        self.timeline.stop(self.zzz_scroll)
+        if self.is_sleeping:
+            self.pose = self.timeline.play("bunny_doze")
+            self.zzz_scroll = self.timeline.play("zzz_scroll")
+        else:
+            self.pose = self.timeline.play("bunny_bob")
+            self.zzz_scroll = None
+
+    def react(self, name):
+        """Play a one-shot reaction over the bunny, replacing any still running"""
+        self.timeline.stop(self.reaction)
+        self.reaction = self.timeline.play(name)
+
+    def adapt_refresh(self):
+        """Full frame rate while something moves, IDLE_FPS otherwise"""
+        active = (self.pellets.any_active()
+                  or self.clock() - self.last_interaction < self.ACTIVE_HOLD)
+        if active != self.display_active:
+            self.display_active = active
+            self.refresh.set_render_fps(self.RENDER_FPS if active else self.IDLE_FPS)
+
     def get_mood(self):
         """Determine pet's mood based on stats"""
         avg_state = (self.hunger + self.happiness) / 2
@@ -165,87 +396,31 @@ class DigitalPet:
         else:
             return "Miserable"
     
-    def draw_pellet(self):
-        """Draw food pellet animation with bounce and arc to mouth"""
-        if not self.show_pellet:
-            return
-
-        if self.pellet_state == "drop":
-            # Initial dropping motion
-            self.pellet_y += self.pellet_velocity_y
-            self.pellet_x += self.pellet_velocity_x
-            
-            # When pellet hits bottom, switch to bounce
-            if self.pellet_y >= self.oled.height - 6:
-                self.pellet_state = "bounce"
-                self.bounce_start_x = self.pellet_x
-                self.bounce_start_y = self.oled.height - 6
-                self.bounce_time = 0
-                
-        elif self.pellet_state == "bounce":
-            # Bouncing motion using parabolic trajectory
-            self.bounce_time += 0.1
-            bounce_height = -20  # Height of bounce
-            bounce_duration = 1.5  # Time to complete bounce
-            
-            # Parabolic motion calculation
-            progress = self.bounce_time / bounce_duration
-            self.pellet_x = self.bounce_start_x + (40 * progress)  # Move right during bounce
-            self.pellet_y = self.bounce_start_y + (bounce_height * progress * (2 - progress))
-            
-            # When bounce is complete, switch to final arc
-            if self.bounce_time >= bounce_duration:
-                self.pellet_state = "arc"
-                self.arc_start_time = 0
-                
-        elif self.pellet_state == "arc":
-            # Final arc to bunny's mouth
-            self.arc_start_time += 0.1
-            arc_duration = 1.0
-            
-            # Calculate arc to bunny's mouth (positioned relative to center)
-            progress = self.arc_start_time / arc_duration
-            target_x = self.oled.width // 2  # Bunny's mouth x position
-            target_y = 39  # Bunny's mouth y position
-            
-            # Arc motion
-            self.pellet_x = self.pellet_x + (target_x - self.pellet_x) * progress
-            self.pellet_y = self.pellet_y + (target_y - self.pellet_y) * progress
-            
-            # End animation when pellet reaches mouth
-            if self.arc_start_time >= arc_duration:
-                self.show_pellet = False
-                self.pellet_state = "drop"
-                self.pellet_x = 10
-                self.pellet_y = 32
-                return
-                
-        # Draw the pellet
-        self.draw.ellipse(
-            (self.pellet_x, self.pellet_y, 
-             self.pellet_x + 4, self.pellet_y + 4),
-            fill=255
-        )
+    def step_pellet(self, dt):
+        """Advance every pellet and feed the pet for those that reach its mouth"""
+        eaten = self.pellets.step()
+        if eaten:
+            self.hunger = min(100, self.hunger + self.PELLET_FOOD * eaten)
+            print("Pellet eaten!")
+            self.journal("eaten")
     
-    def draw_bunny(self):
-        """Draw the bunny in current state"""
+    def place_bunny(self):
+        """Put the bunny (and ZZZs) widgets where the current state draws them"""
+        self.update_pose()
+        frame = int(self.pose.value("frame"))
         if self.is_sleeping:
             # Draw sleeping bunny
-            bunny_frame = self.bunny_sleeping[self.animation_frame]
+            bunny_frame = self.bunny_sleeping[frame]
             
             # Center the sleeping bunny
             text_width = 32  # Approximate width of bunny ASCII art
             x_pos = (self.oled.width - text_width) // 2
             y_pos = 20  # Lower position
-            self.draw.text((x_pos, y_pos), bunny_frame, fill=255)
+            self.bunny.show(self.sprites.get(bunny_frame), x_pos, y_pos)
             
-            # Draw scrolling ZZZs above the bunny
-            zzz_text = "z Z z Z z Z"
-            text_width = len(zzz_text) * 8
-            x_pos = self.oled.width - self.scroll_position
-            self.draw.text((x_pos, 10), zzz_text, fill=255)
-            if x_pos < -text_width:
-                self.scroll_position = 0
+            # Scrolling ZZZs above the bunny
+            x_pos = self.oled.width - int(self.zzz_scroll.value("scroll"))
+            self.zzz.show(self.sprites.get(ZZZ_TEXT), x_pos, 10)
         else:
             # Draw normal/happy/sad bunny
             mood = self.get_mood()
@@ -259,118 +434,241 @@ class DigitalPet:
             text_width = 32
             x_pos = ((self.oled.width - text_width) // 2) + 8
             y_pos = 20
-            self.draw.text((x_pos, y_pos), bunny_frames[self.animation_frame], fill=255)
+            if self.reaction is not None and not self.reaction.done:
+                x_pos += int(self.reaction.value("x"))
+                y_pos += int(self.reaction.value("y"))
+            self.bunny.show(self.sprites.get(bunny_frames[frame]), x_pos, y_pos)
+            self.zzz.hide()
     
     def check_sleep(self):
         """Check if pet should sleep"""
-        if time.time() - self.last_interaction > self.SLEEP_TIMEOUT:
+        if self.clock() - self.last_interaction > self.SLEEP_TIMEOUT:
             if not self.is_sleeping:
                 print("Pet is going to sleep...")
                 self.is_sleeping = True
+                self.journal("sleep")
         else:
             self.is_sleeping = False
     
     def handle_buttons(self):
-        """Handle button inputs"""
+        """Handle queued button presses"""
+        events = self.buttons.poll()
+        for event in events:
+            self.handle_press(event.name)
+        if events:
+            # Back to full rate at once so the press shows without delay
+            self.display_active = True
+            self.refresh.set_render_fps(self.RENDER_FPS)
+            self.refresh.request_render()
+    
+    def handle_press(self, button):
+        """React to a single button press"""
         if self.is_sleeping:
             # Any button press wakes up the pet
-            if any([GPIO.input(self.FEED_BTN), GPIO.input(self.PET_BTN), GPIO.input(self.PLAY_BTN)]):
-                self.is_sleeping = False
-                self.last_interaction = time.time()
-                print("Pet woke up!")
-                return
+            self.is_sleeping = False
+            self.last_interaction = self.clock()
+            print("Pet woke up!")
+            self.journal("wake")
+            return
         
-        if GPIO.input(self.FEED_BTN):
+        if button == "feed":
             print("Feeding pet!")
-            # Remove the direct hunger increase here since we'll do it when pellet is eaten
-            self.last_interaction = time.time()
-            self.show_pellet = True
-            self.pellet_state = "drop"
-            self.pellet_x = 10
-            self.pellet_y = 32  # Start from middle height
-            self.pellet_velocity_y = 4 
-            self.pellet_velocity_x = 2
-            time.sleep(0.2)
+            # Hunger goes up when the pellet is eaten, see step_pellet
+            self.last_interaction = self.clock()
+            self.pellets.spawn()
+            self.journal("feed")
             
-        # Add pellet collision check in update_display or wherever pellet movement is handled
-        if self.show_pellet:
-            # Bunny's mouth position:
-            # X: Center of screen (64)
-            # Y: Slightly above bottom (42) for more natural feeding
-            # Detection zone: 5 pixel radius
-            if abs(self.pellet_x - 64) < 5 and abs(self.pellet_y - 42) < 5:
-                self.hunger = min(100, self.hunger + 15)
-                self.show_pellet = False
-                print("Pellet eaten!")
-
-        if GPIO.input(self.PET_BTN):
+        elif button == "pet":
             print("Petting!")
             self.happiness = min(100, self.happiness + 15)
-            self.last_interaction = time.time()
-            time.sleep(0.2)
+            self.last_interaction = self.clock()
+            self.react("pet_hop")
+            self.journal("pet")
             
-        if GPIO.input(self.PLAY_BTN):
+        elif button == "play":
             print("Playing!")
             self.hunger = max(0, self.hunger - 5)
             self.happiness = min(100, self.happiness + 10)
-            self.last_interaction = time.time()
-            time.sleep(0.2)
+            self.last_interaction = self.clock()
+            self.react("play_wiggle")
+            self.journal("play")
     
-    def draw_status_bar(self, x_pos, y_pos, value, label):
-        """Draw status value at specified position"""
-        status_text = f"{label}: {int(value)}"
-        self.draw.text((x_pos, y_pos), status_text, fill=255)
+    def place_status_bar(self, widget, x_pos, y_pos, value, label):
+        """Show a status value at the specified position"""
+        widget.show(self.sprites.get_status(label, value), x_pos, y_pos)
 
     def update_display(self):
         """Update OLED display"""
-        self.draw.rectangle((0, 0, self.oled.width, self.oled.height), outline=0, fill=0)
-        
-        # Only draw status values if awake
+        self.render_frame()
+        # Nothing repainted means the canvas still holds the last frame sent
+        changed = self.scene.last_damage > 0
+        if changed and self.capture is not None:
+            self.capture.add(self.clock(), self.canvas.frame())
+        if self.pipeline is not None:
+            self.pipeline.submit(self.canvas.frame(), changed)
+        else:
+            self.display.show_frame(self.canvas.frame(), changed)
+
+    def render_frame(self):
+        """Update the widgets and redraw the parts of the canvas that changed"""
+        # Only show status values if awake
         if not self.is_sleeping:
-            self.draw_status_bar(0, 0, self.hunger, "Hunger")  # Left side
+            self.place_status_bar(self.hunger_label, 0, 0, self.hunger, "Hunger")  # Left side
             # Calculate position for happiness to right-align it
-            happy_text = f"Happy: {int(self.happiness)}"
+            happy_text = self.sprites.get_status("Happy", self.happiness).text
             happy_width = len(happy_text) * 6  # Approximate pixel width of text
-            self.draw_status_bar(self.oled.width - happy_width, 0, self.happiness, "Happy")
+            self.place_status_bar(self.happy_label, self.oled.width - happy_width, 0,
+                                  self.happiness, "Happy")
+        else:
+            self.hunger_label.hide()
+            self.happy_label.hide()
         
-        # Draw bunny
-        self.draw_bunny()
+        self.place_bunny()
         
-        # Draw pellet animation if active
-        if not self.is_sleeping:
-            self.draw_pellet()
+        # Pellets are only shown while awake
+        self.pellet_layer.update(visible=not self.is_sleeping)
         
-        self.oled.image(self.image)
-        self.oled.show()
+        self.scene.compose()
 
     def run(self):
         """Main loop"""
         print("Digital Pet is running! Press Ctrl+C to exit")
         try:
-            while self.running:
-                self.update_stats()
-                self.check_sleep()
-                self.handle_buttons()
-                self.check_random_events()
-                self.update_display()
-                time.sleep(0.1)
+            self.loop.run(self.handle_buttons, self.tick, self.update_display,
+                          lambda: self.running)
         except KeyboardInterrupt:
             self.cleanup()
     
-    def check_random_events(self):
+    def check_random_events(self, dt):
         """Generate random events"""
-        if random.random() < 0.01 and not self.is_sleeping:  # 1% chance per check
-            self.hunger = max(0, self.hunger - 20)  # Sudden hunger
-            print("Pet is suddenly hungry!")
+        now = self.clock()
+        gap = now - self.last_event_check
+        self.last_event_check = now
+        if gap > self.CATCHUP_GAP:
+            # Paused or stalled: settle the whole gap in one step
+            self.apply_expected_events(now - gap, now)
+            return
+        # Keep the original 1% per 0.1 s check whatever the tick rate
+        chance = 1 - (1 - self.RANDOM_EVENT_CHANCE) ** (dt / 0.1)
+        if self.event_countdown is not None:
+            # Tickless: count down to an event drawn ahead of time instead
+            # of rolling every tick, so the loop knows when it is due
+            if self.is_sleeping:
+                return
+            self.event_countdown -= 1
+            if self.event_countdown > 0:
+                return
+            self.event_countdown = self.draw_event_ticks(chance)
+        elif self.rng.random() >= chance or self.is_sleeping:
+            return
+        self.hunger = max(0, self.hunger - 20)  # Sudden hunger
+        print("Pet is suddenly hungry!")
+        self.journal("hungry")
     
-    def cleanup(self):
-        """Clean up GPIO and clear display"""
+    def draw_event_ticks(self, chance):
+        """Ticks until the next random event, the same odds as a roll per tick"""
+        if chance <= 0:
+            return math.inf
+        # Geometric: the number of rolls up to and including the first hit
+        return int(math.log(1 - self.rng.random()) / math.log1p(-chance)) + 1
+    
+    def apply_expected_events(self, start, end):
+        """Take the expected sudden-hunger loss for an interval without ticks"""
+        # Events only happen while awake, until SLEEP_TIMEOUT after the last interaction
+        awake = min(end, self.last_interaction + self.SLEEP_TIMEOUT) - start
+        if awake <= 0:
+            return
+        rate = event_rate(self.RANDOM_EVENT_CHANCE, 0.1)
+        loss = 20 * rate * awake
+        self.hunger = self.hunger - loss
+        print(f"Caught up {end - start:.1f} s, expected hunger loss {loss:.1f}")
+        self.journal("hungry")
+    
+    def cleanup(self, hosted=False):
+        """Clean up GPIO and clear display
+
+        hosted=True leaves the shared GPIO and the loop report to a host
+        running several pets (see multipet.PetHost). A runtime that took
+        over pacing from the GameLoop (see async_runtime) reports its own
+        counters, so the unused loop's are left out then too.
+        """
         self.running = False
-        self.oled.fill(0)
-        self.oled.show()
-        GPIO.cleanup()
-        print("\nGoodbye!")
+        if self.exporter is not None:
+            self.exporter.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.capture is not None:
+            self.capture.close()
+        if self.profiler is not None:
+            self.profiler.close()
+        if self.store is not None:
+            self.store.close(self.save_state())
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        self.oled.clear()
+        self.display.invalidate()
+        self.buttons.close()
+        if not hosted:
+            self.gpio.cleanup()
+        print(f"\nDisplay: {self.display.frames} frames, "
+              f"{self.display.average_bytes():.1f} bytes/frame over I2C, "
+              f"{self.display.skipped} unchanged frames skipped")
+        if self.pipeline is not None:
+            print(f"Pipeline: {self.pipeline.rendered} rendered, "
+                  f"{self.pipeline.transferred} transferred, {self.pipeline.dropped} dropped, "
+                  f"{self.pipeline.skipped} unchanged frames skipped")
+        print(f"Scene: {self.scene.average_damage():.1f} damaged pixels/frame")
+        print(f"Sprites: {self.sprites.hits} cache hits, {self.sprites.misses} misses")
+        if not hosted and self.refresh is self.loop:
+            print(f"Loop: {self.loop.ticks} ticks, {self.loop.frames} frames, "
+                  f"{self.loop.dropped_ticks} dropped ticks, {self.loop.late_frames} late frames, "
+                  f"{self.loop.missed_deadlines} missed deadlines, {self.loop.wakeups} wakeups, "
+                  f"{self.loop.skipped_ticks} ticks skipped while idle")
+        print(f"Buttons: {self.buttons.handled} presses, "
+              f"max latency {self.buttons.max_latency * 1000:.1f} ms")
+        print("Goodbye!")
+
+def create_pet(args, oled=None, gpio=None):
+    """Build a DigitalPet from command line options"""
+    if oled is None:
+        oled = open_display(args.simulate)
+    if gpio is None:
+        gpio = open_gpio(args.simulate)
+    store = None if args.no_persist else StateStore(args.state_dir)
+    # The asyncio runtime does its own transfers in an executor
+    pipelined = not (args.no_pipeline or args.asyncio or args.display_process)
+    pet = DigitalPet(oled, gpio, store, pipelined=pipelined, renderer=args.renderer)
+    if args.display_process:
+        from display_process import DisplayProcess
+        # The child opens its own handle on the panel
+        pet.pipeline = DisplayProcess(pet.display, partial(open_display, args.simulate))
+    if args.tickless:
+        pet.enable_tickless()
+    if args.profile_dir:
+        from profiler import SamplingProfiler
+        # Its signals are hooked up in start(), since the pet may be built
+        # off the main thread (see startup.py)
+        pet.profiler = SamplingProfiler(args.profile_dir, args.profile_rate)
+    if args.metrics or args.metrics_file or args.metrics_socket:
+        pet.enable_metrics(args.metrics_file, args.metrics_socket, args.metrics_interval)
+    if args.record:
+        from session import Recorder
+        pet.recorder = Recorder(pet, args.record, args.seed)
+    if args.capture:
+        from capture import FrameCapture
+        pet.capture = FrameCapture(args.capture, oled.width, oled.height, pet.clock())
+    return pet
+
+def start(pet, args):
+    """Run the pet on the runtime chosen on the command line (main thread only)"""
+    if pet.profiler is not None:
+        pet.profiler.install()
+    if args.asyncio:
+        from async_runtime import AsyncRuntime
+        AsyncRuntime(pet).run()
+    else:
+        pet.run()
 
 if __name__ == "__main__":
-    pet = DigitalPet()
-    pet.run()
\ No newline at end of file
+    args = parse_args()
+    start(create_pet(args), args)
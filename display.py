@@ -0,0 +1,222 @@
+import threading
+
+import numpy as np
+from PIL import Image
+
+# SSD1306 addressing commands (the driver leaves the panel in horizontal mode)
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
+
+# Every command goes over I2C as a (0x80 control byte, command) pair
+CMD_BYTES = 2
+# Column + page window = 6 commands
+WINDOW_CMD_BYTES = 6 * CMD_BYTES
+
+
+def pack_image(image, out=None):
+    """Pack a 1-bit PIL image into SSD1306 page layout (pages x width uint8)"""
+    width, height = image.size
+    # Rotating clockwise turns each display column into one row whose packed
+    # bytes are the pages bottom-up, bit 0 being the top pixel of each page
+    rotated = image.transpose(Image.Transpose.ROTATE_270)
+    columns = np.frombuffer(rotated.tobytes(), dtype=np.uint8).reshape(width, height // 8)
+    if out is None:
+        return np.ascontiguousarray(columns[:, ::-1].T)
+    np.copyto(out, columns[:, ::-1].T)
+    return out
+
+
+def window_cost(col_start, col_end, page_start, page_end):
+    """Bytes on the bus needed to rewrite one column/page window"""
+    data = (col_end - col_start + 1) * (page_end - page_start + 1)
+    return WINDOW_CMD_BYTES + 1 + data
+
+
+def same_frame(frame, other, mask):
+    """Whether two page buffers match, comparing through a preallocated bool mask"""
+    return not np.not_equal(frame, other, out=mask).any()
+
+
+def dirty_windows(frame, last_frame, changed=None):
+    """Return the (col_start, col_end, page_start, page_end) windows to resend
+
+    changed is the frame != last_frame mask when the caller already has it.
+    """
+    if changed is None:
+        changed = frame != last_frame
+    windows = []
+    for page in np.flatnonzero(changed.any(axis=1)):
+        cols = np.flatnonzero(changed[page])
+        span = (int(cols[0]), int(cols[-1]), int(page), int(page))
+        if windows:
+            # Merge into the previous window when one bigger write is cheaper
+            # than paying the addressing overhead twice
+            prev = windows[-1]
+            merged = (min(prev[0], span[0]), max(prev[1], span[1]), prev[2], span[3])
+            if window_cost(*merged) <= window_cost(*prev) + window_cost(*span):
+                windows[-1] = merged
+                continue
+        windows.append(span)
+    return windows
+
+
+class DeltaDisplay:
+    """Send only the changed SSD1306 pages/columns instead of full frames
+
+    oled is a display backend from hardware.py (write_cmd/write_data).
+    """
+
+    def __init__(self, oled):
+        self.oled = oled
+        self.width = oled.width
+        self.height = oled.height
+        self.pages = oled.height // 8
+        # Panels narrower than 128 columns are centred in the controller RAM
+        self.col_offset = (128 - self.width) // 2 if self.width != 128 else 0
+
+        # Last page buffer actually on the panel, only trusted while valid
+        self.last_sent = np.zeros((self.pages, self.width), dtype=np.uint8)
+        self.valid = False
+        # Where the last compared frame differs from last_sent
+        self.mask = np.zeros((self.pages, self.width), dtype=bool)
+
+        # Bus statistics
+        self.last_frame_bytes = 0
+        self.total_bytes = 0
+        self.frames = 0
+        self.skipped = 0
+
+    def invalidate(self):
+        """Forget what is on the panel so the next frame is sent in full"""
+        self.valid = False
+
+    def unchanged(self, frame):
+        """Whether the panel already shows exactly this frame"""
+        return self.valid and same_frame(frame, self.last_sent, self.mask)
+
+    def show_frame(self, frame, changed=True):
+        """Push a packed page buffer, sending only what changed
+
+        changed=False is the caller's word that the frame is the one it sent
+        last time, which skips even the comparison.
+        """
+        if (not changed and self.valid) or self.unchanged(frame):
+            # Identical frame, nothing to diff or send
+            self.last_frame_bytes = 0
+            self.skipped += 1
+            return 0
+        if not self.valid:
+            windows = [(0, self.width - 1, 0, self.pages - 1)]
+        else:
+            # unchanged() left the difference in the mask
+            windows = dirty_windows(frame, self.last_sent, self.mask)
+
+        sent = 0
+        for window in windows:
+            sent += self.write_window(frame, *window)
+        np.copyto(self.last_sent, frame)
+        self.valid = True
+
+        self.last_frame_bytes = sent
+        self.total_bytes += sent
+        self.frames += 1
+        return sent
+
+    def write_window(self, frame, col_start, col_end, page_start, page_end):
+        """Set the address window and write its bytes, returning bytes sent"""
+        self.oled.write_cmd(SET_COL_ADDR)
+        self.oled.write_cmd(col_start + self.col_offset)
+        self.oled.write_cmd(col_end + self.col_offset)
+        self.oled.write_cmd(SET_PAGE_ADDR)
+        self.oled.write_cmd(page_start)
+        self.oled.write_cmd(page_end)
+
+        data = frame[page_start:page_end + 1, col_start:col_end + 1].tobytes()
+        self.oled.write_data(data)
+        # Data goes out behind a single control byte
+        return WINDOW_CMD_BYTES + 1 + len(data)
+
+    def average_bytes(self):
+        """Average bytes pushed per frame so far"""
+        if not self.frames:
+            return 0
+        return self.total_bytes / self.frames
+
+
+class FramePipeline:
+    """Overlap rendering and I2C transfer with a display-writer thread
+
+    Frames are triple buffered: the main loop copies into the back buffer and
+    publishes it as the newest ready frame, and the writer thread swaps the
+    ready frame into its front buffer and transfers it. If the writer is still
+    busy when another frame is published, the stale ready frame is dropped,
+    so the panel always catches up to the newest frame and the render loop
+    never waits on the bus. A frame identical to the last one published is
+    dropped before it reaches the writer.
+    """
+
+    def __init__(self, display):
+        self.display = display
+        shape = (display.pages, display.width)
+        self.back = np.zeros(shape, dtype=np.uint8)
+        self.ready = np.zeros(shape, dtype=np.uint8)
+        self.front = np.zeros(shape, dtype=np.uint8)
+        self.mask = np.zeros(shape, dtype=bool)
+        self.has_ready = False
+        # Most recently published buffer; never repacked while it is the newest
+        self.latest = None
+        self.running = True
+        self.changed = threading.Condition()
+
+        # Frame accounting
+        self.rendered = 0
+        self.transferred = 0
+        self.dropped = 0
+        self.skipped = 0
+
+        self.thread = threading.Thread(target=self.writer, name="frame-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, frame, changed=True):
+        """Copy a finished page-layout frame and hand it to the writer
+
+        With changed=False the frame is taken to be the last one submitted.
+        """
+        if not changed and self.latest is not None:
+            self.skipped += 1
+            return
+        np.copyto(self.back, frame)
+        if self.latest is not None and same_frame(self.back, self.latest, self.mask):
+            # Same as the last frame published, don't wake the writer
+            self.skipped += 1
+            return
+        with self.changed:
+            if self.has_ready:
+                self.dropped += 1
+            self.back, self.ready = self.ready, self.back
+            self.latest = self.ready
+            self.has_ready = True
+            self.rendered += 1
+            self.changed.notify_all()
+
+    def writer(self):
+        """Writer thread: transfer the newest ready frame, forever"""
+        while True:
+            with self.changed:
+                while not self.has_ready and self.running:
+                    self.changed.wait()
+                if not self.has_ready:
+                    return
+                self.front, self.ready = self.ready, self.front
+                self.has_ready = False
+            self.display.show_frame(self.front)
+            with self.changed:
+                self.transferred += 1
+                self.changed.notify_all()
+
+    def stop(self):
+        """Finish the pending frame and stop the writer thread"""
+        with self.changed:
+            self.running = False
+            self.changed.notify_all()
+        self.thread.join(timeout=1.0)
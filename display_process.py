@@ -0,0 +1,209 @@
+"""Drive the display from a child process over a shared-memory framebuffer
+
+The pet process publishes each finished frame into a shared page buffer
+guarded by a sequence number (odd while a copy is in progress) and posts a
+semaphore; the child copies out the newest complete frame, diffs it against
+the panel and does the I2C writes, then reports the sequence number it
+showed. Neither side ever waits on the other, so bus time and the driver's
+own Python work never hold the pet process's GIL. A supervisor thread
+restarts the child with backoff when it dies, e.g. on an I2C error; the pet
+state never leaves the parent, so nothing is lost and the new child starts
+by sending the latest frame in full.
+"""
+import multiprocessing
+import signal
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from display import DeltaDisplay, same_frame
+
+# Header words, uint64 each, ahead of the page buffer
+SEQ = 0          # bumped to odd before the parent copies a frame in, even after
+SHOWN = 1        # sequence number of the frame the child last put on the panel
+TRANSFERRED = 2  # frames the child sent (unchanged ones are not counted)
+BYTES = 3        # I2C bytes the child sent
+HEADER_WORDS = 8
+
+# How often an idle child checks for shutdown
+IDLE_WAIT = 0.5
+# Attempts at a consistent copy before waiting for the next frame
+READ_RETRIES = 100
+
+# Restart backoff: doubles per quick crash, resets after a stable run
+RESTART_DELAY = 0.1
+MAX_RESTART_DELAY = 5.0
+STABLE_RUN = 10.0
+
+
+def frame_views(shm, width, height):
+    """Header words and page buffer inside a shared memory block"""
+    header = np.ndarray(HEADER_WORDS, dtype=np.uint64, buffer=shm.buf)
+    frame = np.ndarray((height // 8, width), dtype=np.uint8, buffer=shm.buf,
+                       offset=HEADER_WORDS * 8)
+    return header, frame
+
+
+def read_frame(header, frame, out):
+    """Copy the newest complete frame into out and return its sequence number"""
+    for _ in range(READ_RETRIES):
+        seq = int(header[SEQ])
+        if seq & 1:
+            # The parent is mid-copy, which takes microseconds
+            continue
+        np.copyto(out, frame)
+        if int(header[SEQ]) == seq:
+            return seq
+    return None
+
+
+def run_display(name, width, height, factory, ready, stop):
+    """Child process: put every new frame on the panel until told to stop"""
+    # Ctrl+C reaches the whole process group; the parent decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Spawned children share the parent's resource tracker, so attaching
+    # registers nothing new and the parent's unlink stays the only cleanup
+    shm = shared_memory.SharedMemory(name=name)
+    header, frame = frame_views(shm, width, height)
+    local = np.zeros(frame.shape, dtype=np.uint8)
+    display = DeltaDisplay(factory())
+    # A restarted child carries on the totals, but shows the current frame
+    # in full whatever its predecessor got to
+    shown = 0
+    transferred = int(header[TRANSFERRED])
+    sent = int(header[BYTES])
+    try:
+        while not stop.is_set():
+            seq = read_frame(header, frame, local)
+            if seq is not None and seq != shown:
+                sent += display.show_frame(local)
+                transferred += 1
+                header[BYTES] = sent
+                header[TRANSFERRED] = transferred
+                header[SHOWN] = shown = seq
+                continue
+            if ready.acquire(timeout=IDLE_WAIT):
+                # Frames that arrived meanwhile are all covered by the next read
+                while ready.acquire(False):
+                    pass
+    finally:
+        del header, frame
+        shm.close()
+
+
+class DisplayProcess:
+    """Stand-in for FramePipeline that hands frames to a display child process
+
+    display is the pet's own DeltaDisplay, which gets the child's transfer
+    totals when stopping; factory builds the backend inside the child and
+    must be picklable, e.g. functools.partial(hardware.open_display, simulate).
+    """
+
+    def __init__(self, display, factory):
+        self.display = display
+        self.width = width = display.width
+        self.height = height = display.height
+        self.factory = factory
+        self.context = multiprocessing.get_context("spawn")
+        size = HEADER_WORDS * 8 + width * height // 8
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.header, self.frame = frame_views(self.shm, width, height)
+        self.header[:] = 0
+        self.mask = np.zeros(self.frame.shape, dtype=bool)
+        self.seq = 0
+        self.ready = self.context.Semaphore(0)
+        self.stop_event = self.context.Event()
+
+        # Frame accounting (transferred and dropped are read from the child)
+        self.rendered = 0
+        self.skipped = 0
+        self.restarts = 0
+
+        self.lock = threading.Lock()
+        self.stopping = False
+        self.process = None
+        self.started = 0.0
+        self.spawn()
+        self.supervisor = threading.Thread(target=self.supervise, daemon=True)
+        self.supervisor.start()
+
+    @property
+    def transferred(self):
+        return int(self.header[TRANSFERRED])
+
+    @property
+    def dropped(self):
+        """Frames replaced before the child got to them"""
+        pending = 1 if int(self.header[SHOWN]) != self.seq else 0
+        return max(0, self.rendered - self.transferred - pending)
+
+    @property
+    def total_bytes(self):
+        return int(self.header[BYTES])
+
+    def spawn(self):
+        self.process = self.context.Process(
+            target=run_display, name="display", daemon=True,
+            args=(self.shm.name, self.width, self.height, self.factory,
+                  self.ready, self.stop_event))
+        self.process.start()
+        self.started = time.monotonic()
+
+    def supervise(self):
+        """Supervisor thread: restart the child whenever it dies unasked"""
+        delay = RESTART_DELAY
+        while True:
+            self.process.join()
+            with self.lock:
+                if self.stopping:
+                    return
+            if time.monotonic() - self.started > STABLE_RUN:
+                delay = RESTART_DELAY
+            print(f"Display process exited with code {self.process.exitcode}, "
+                  f"restarting in {delay:.1f} s")
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_RESTART_DELAY)
+            with self.lock:
+                if self.stopping:
+                    return
+                self.restarts += 1
+                self.spawn()
+
+    def submit(self, frame, changed=True):
+        """Publish a finished frame to the child, never waiting on it"""
+        if self.seq and (not changed or same_frame(frame, self.frame, self.mask)):
+            self.skipped += 1
+            return
+        # Odd while copying, so the child never shows half a frame
+        self.header[SEQ] = self.seq + 1
+        np.copyto(self.frame, frame)
+        self.seq += 2
+        self.header[SEQ] = self.seq
+        self.rendered += 1
+        self.ready.release()
+
+    def stop(self):
+        """Let the child send what is waiting, then shut it down"""
+        with self.lock:
+            self.stopping = True
+        deadline = time.monotonic() + 2.0
+        while (self.process.is_alive() and int(self.header[SHOWN]) != self.seq
+               and time.monotonic() < deadline):
+            time.sleep(0.01)
+        self.stop_event.set()
+        self.ready.release()
+        self.process.join(timeout=2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.supervisor.join(timeout=2.0)
+
+        # Keep the counters readable once the shared block is gone
+        self.header = self.header.copy()
+        self.frame = self.frame.copy()
+        self.shm.close()
+        self.shm.unlink()
+        self.display.frames += self.transferred
+        self.display.total_bytes += self.total_bytes
@@ -0,0 +1,114 @@
+"""Render targets for the scene: a native SSD1306 framebuffer and a PIL image
+
+Both take the same two calls from widgets, clear_rect() and blit(), and
+return the finished frame in SSD1306 page layout from frame(). FrameBuffer
+draws straight into that layout so there is nothing to convert afterwards;
+ImageCanvas keeps the old PIL path for comparison.
+"""
+import numpy as np
+from PIL import Image, ImageDraw
+
+from display import pack_image
+
+
+def pack_phases(image, shift):
+    """Pack a 1-bit image into page bytes, shifted down by 0-7 rows"""
+    bits = np.array(image, dtype=bool)
+    height, width = bits.shape
+    pages = (height + shift + 7) // 8
+    padded = np.zeros((pages * 8, width), dtype=bool)
+    padded[shift:shift + height] = bits
+    # Bit k of each page byte is row k of that page
+    return np.packbits(padded.reshape(pages, 8, width), axis=1, bitorder="little")[:, 0, :]
+
+
+def unpack_image(pages):
+    """A PIL image of a pages x width frame in SSD1306 page layout"""
+    height, width = pages.shape[0] * 8, pages.shape[1]
+    rows = np.unpackbits(pages[:, np.newaxis, :], axis=1, bitorder="little")
+    return Image.fromarray(rows.reshape(height, width) * 255).convert("1")
+
+
+class FrameBuffer:
+    """A pages x width uint8 buffer in the controller's own layout
+
+    Sprites are packed once per vertical phase (y % 8) the first time they
+    are drawn at it, so a blit is a single vectorized OR of a pre-shifted
+    block into the buffer, clipped to the screen.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.pages = height // 8
+        self.buf = np.zeros((self.pages, width), dtype=np.uint8)
+
+    def clear(self):
+        self.buf.fill(0)
+
+    def clear_rect(self, rect):
+        """Zero the pixels in an (x0, y0, x1, y1) end-exclusive rectangle"""
+        x0, y0, x1, y1 = rect
+        for page in range(y0 // 8, (y1 - 1) // 8 + 1):
+            low = max(0, y0 - page * 8)
+            high = min(8, y1 - page * 8)
+            keep = ~((1 << high) - (1 << low)) & 0xFF
+            if keep:
+                self.buf[page, x0:x1] &= keep
+            else:
+                self.buf[page, x0:x1] = 0
+
+    def blit(self, sprite, position):
+        """OR a sprite onto the buffer with its top-left corner at position"""
+        x, y = int(position[0]), int(position[1])
+        shift = y % 8
+        packed = sprite.packed[shift]
+        if packed is None:
+            packed = sprite.packed[shift] = pack_phases(sprite.image, shift)
+        page = y // 8
+        pages, width = packed.shape
+
+        # Clip against the screen edges
+        top = max(0, -page)
+        bottom = min(pages, self.pages - page)
+        left = max(0, -x)
+        right = min(width, self.width - x)
+        if top >= bottom or left >= right:
+            return
+        self.buf[page + top:page + bottom, x + left:x + right] |= packed[top:bottom, left:right]
+
+    def frame(self):
+        """The frame as it goes to the panel (the live buffer, not a copy)"""
+        return self.buf
+
+    def to_image(self):
+        """Unpack to a PIL image, for screenshots and debugging"""
+        return unpack_image(self.buf)
+
+
+class ImageCanvas:
+    """The PIL rendering path: draw into an Image("1"), pack it afterwards"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.image = Image.new("1", (width, height))
+        self.draw = ImageDraw.Draw(self.image)
+        self.packed = np.zeros((height // 8, width), dtype=np.uint8)
+
+    def clear(self):
+        self.draw.rectangle((0, 0, self.width, self.height), outline=0, fill=0)
+
+    def clear_rect(self, rect):
+        x0, y0, x1, y1 = rect
+        self.draw.rectangle((x0, y0, x1 - 1, y1 - 1), outline=0, fill=0)
+
+    def blit(self, sprite, position):
+        self.image.paste(255, (int(position[0]), int(position[1])), sprite.image)
+
+    def frame(self):
+        """Pack the image into page layout (reusing one buffer)"""
+        return pack_image(self.image, out=self.packed)
+
+    def to_image(self):
+        return self.image
@@ -0,0 +1,352 @@
+import errno
+import threading
+import time
+
+# SSD1306 commands the simulator understands
+SET_MEM_ADDR = 0x20
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
+DISPLAY_OFF = 0xAE
+DISPLAY_ON = 0xAF
+
+# Data writes carry a leading 0x40 control byte
+DATA_PREFIX = 0x40
+
+# 9 clocks per byte (8 data + ACK) at 400 kHz fast-mode I2C
+I2C_BYTE_TIME = 9 / 400_000
+
+
+class AdafruitDisplay:
+    """Display backend for a real SSD1306 over I2C via the Adafruit driver"""
+
+    def __init__(self, width=128, height=64, addr=0x3C, i2c=None):
+        import board
+        import adafruit_ssd1306
+
+        if i2c is None:
+            i2c = board.I2C()
+        self.oled = adafruit_ssd1306.SSD1306_I2C(width, height, i2c, addr=addr)
+        self.width = width
+        self.height = height
+
+    def write_cmd(self, cmd):
+        """Send one command byte"""
+        self.oled.write_cmd(cmd)
+
+    def write_data(self, data):
+        """Write bytes into the current column/page window"""
+        payload = bytearray([DATA_PREFIX]) + data
+        with self.oled.i2c_device:
+            self.oled.i2c_device.write(payload)
+
+    def clear(self):
+        """Blank the panel"""
+        self.oled.fill(0)
+        self.oled.show()
+
+
+class SimulatedSSD1306:
+    """In-process SSD1306 that emulates GDDRAM addressing and I2C cost
+
+    Commands and data are decoded the way the controller does in horizontal
+    addressing mode, so the RAM contents match what a real panel would show.
+    Every transaction is logged and charged byte_time seconds per byte on the
+    bus (plus the address byte); with sleep=True the caller actually blocks
+    for that long, otherwise the cost is only accumulated in bus_time. With
+    spin=True the wait is a busy loop that holds the GIL, the way a driver
+    doing its transfers in Python competes with the other threads. Passing
+    fail_after makes the bus raise EREMOTEIO once that many bytes went out,
+    for exercising error recovery.
+    """
+
+    def __init__(self, width=128, height=64, addr=0x3C, byte_time=I2C_BYTE_TIME, sleep=True,
+                 record=False, spin=False, fail_after=None):
+        self.width = width
+        self.height = height
+        self.addr = addr
+        self.pages = height // 8
+        self.byte_time = byte_time
+        self.sleep = sleep
+        self.record = record
+        self.spin = spin
+        self.fail_after = fail_after
+
+        self.ram = bytearray(self.pages * width)
+        self.col_start, self.col_end = 0, width - 1
+        self.page_start, self.page_end = 0, self.pages - 1
+        self.col, self.page = 0, 0
+        self.pending = []    # command waiting for its argument bytes
+        self.powered = True
+
+        # Bus accounting
+        self.log = []
+        self.bytes_written = 0
+        self.transactions = 0
+        self.bus_time = 0.0
+        self.lock = threading.Lock()
+
+    def transfer(self, nbytes):
+        """Charge one I2C transaction of nbytes payload bytes"""
+        if self.fail_after is not None and self.bytes_written >= self.fail_after:
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")
+        cost = (nbytes + 1) * self.byte_time
+        self.bytes_written += nbytes
+        self.transactions += 1
+        self.bus_time += cost
+        if self.sleep and cost > 0:
+            if self.spin:
+                end = time.perf_counter() + cost
+                while time.perf_counter() < end:
+                    pass
+            else:
+                time.sleep(cost)
+
+    def write_cmd(self, cmd):
+        """Send one command byte (as the 0x80 control + command pair)"""
+        with self.lock:
+            if self.record:
+                self.log.append(("cmd", cmd))
+            self.transfer(2)
+            if self.pending:
+                self.pending.append(cmd)
+                self.apply_command()
+            elif cmd in (SET_COL_ADDR, SET_PAGE_ADDR, SET_MEM_ADDR):
+                self.pending = [cmd]
+            elif cmd == DISPLAY_OFF:
+                self.powered = False
+            elif cmd == DISPLAY_ON:
+                self.powered = True
+
+    def apply_command(self):
+        """Apply a multi-byte command once all its arguments have arrived"""
+        cmd = self.pending[0]
+        args = self.pending[1:]
+        if cmd == SET_COL_ADDR and len(args) == 2:
+            self.col_start, self.col_end = args
+            self.col = self.col_start
+        elif cmd == SET_PAGE_ADDR and len(args) == 2:
+            self.page_start, self.page_end = args
+            self.page = self.page_start
+        elif cmd == SET_MEM_ADDR and len(args) == 1:
+            pass  # only horizontal addressing is emulated
+        else:
+            return
+        self.pending = []
+
+    def write_data(self, data):
+        """Write bytes into the current window, wrapping like the controller"""
+        with self.lock:
+            if self.record:
+                self.log.append(("data", self.col, self.page, bytes(data)))
+            self.transfer(len(data) + 1)
+            for value in data:
+                self.ram[self.page * self.width + self.col] = value
+                self.col += 1
+                if self.col > self.col_end:
+                    self.col = self.col_start
+                    self.page += 1
+                    if self.page > self.page_end:
+                        self.page = self.page_start
+
+    def clear(self):
+        """Blank the panel the way the Adafruit driver's fill(0) + show() does"""
+        self.write_cmd(SET_COL_ADDR)
+        self.write_cmd(0)
+        self.write_cmd(self.width - 1)
+        self.write_cmd(SET_PAGE_ADDR)
+        self.write_cmd(0)
+        self.write_cmd(self.pages - 1)
+        self.write_data(bytes(len(self.ram)))
+
+    def frame(self):
+        """Snapshot of the panel RAM in page layout"""
+        with self.lock:
+            return bytes(self.ram)
+
+    def to_image(self):
+        """Render the panel RAM as a 1-bit PIL image"""
+        from PIL import Image
+
+        image = Image.new("1", (self.width, self.height))
+        pixels = image.load()
+        ram = self.frame()
+        for page in range(self.pages):
+            row = ram[page * self.width:(page + 1) * self.width]
+            for x, value in enumerate(row):
+                for bit in range(8):
+                    if value & (1 << bit):
+                        pixels[x, page * 8 + bit] = 255
+        return image
+
+
+class TCA9548A:
+    """TCA9548A-style I2C multiplexer, only written to when the channel changes"""
+
+    def __init__(self, i2c=None, addr=0x70):
+        if i2c is None:
+            import board
+            i2c = board.I2C()
+        self.i2c = i2c
+        self.addr = addr
+        self.channel = None
+        self.switches = 0
+
+    def select(self, channel):
+        """Route the downstream bus to one channel"""
+        if channel == self.channel:
+            return
+        while not self.i2c.try_lock():
+            pass
+        try:
+            self.i2c.writeto(self.addr, bytes([1 << channel]))
+        finally:
+            self.i2c.unlock()
+        self.channel = channel
+        self.switches += 1
+
+
+class SimulatedMux:
+    """Stand-in for a TCA9548A that charges the bus time of each switch"""
+
+    def __init__(self, addr=0x70, byte_time=I2C_BYTE_TIME, sleep=True):
+        self.addr = addr
+        self.byte_time = byte_time
+        self.sleep = sleep
+        self.channel = None
+        self.switches = 0
+        self.bus_time = 0.0
+
+    def select(self, channel):
+        if channel == self.channel:
+            return
+        # Address byte plus the channel mask
+        cost = 2 * self.byte_time
+        self.bus_time += cost
+        if self.sleep:
+            time.sleep(cost)
+        self.channel = channel
+        self.switches += 1
+
+
+class MuxChannel:
+    """A display backend behind one mux channel, selected before every write"""
+
+    def __init__(self, oled, mux, channel):
+        self.oled = oled
+        self.mux = mux
+        self.channel = channel
+        self.width = oled.width
+        self.height = oled.height
+
+    def write_cmd(self, cmd):
+        self.mux.select(self.channel)
+        self.oled.write_cmd(cmd)
+
+    def write_data(self, data):
+        self.mux.select(self.channel)
+        self.oled.write_data(data)
+
+    def clear(self):
+        self.mux.select(self.channel)
+        self.oled.clear()
+
+
+class FakeGPIO:
+    """Scriptable stand-in for the RPi.GPIO module
+
+    Presses are injected with press() or replayed from a script of
+    (seconds, pin) pairs on a background thread. Edge callbacks fire on the
+    injecting thread just like RPi.GPIO's own callback thread, and the
+    bouncetime given to add_event_detect is honoured.
+    """
+
+    BCM = 11
+    BOARD = 10
+    IN = 1
+    OUT = 0
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.mode = None
+        self.levels = {}
+        self.callbacks = {}
+        self.last_edge = {}
+        self.presses = 0
+        self.bounced = 0
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setup(self, pin, direction, pull_up_down=None):
+        self.levels[pin] = 0
+
+    def input(self, pin):
+        return self.levels.get(pin, 0)
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=0):
+        self.callbacks[pin] = (callback, bouncetime / 1000.0)
+
+    def remove_event_detect(self, pin):
+        self.callbacks.pop(pin, None)
+
+    def cleanup(self):
+        self.callbacks.clear()
+        self.levels.clear()
+
+    def press(self, pin):
+        """Simulate a rising edge on pin"""
+        self.presses += 1
+        self.levels[pin] = 1
+        entry = self.callbacks.get(pin)
+        if entry is not None:
+            callback, bouncetime = entry
+            now = self.clock()
+            last = self.last_edge.get(pin)
+            if last is not None and now - last < bouncetime:
+                self.bounced += 1
+            else:
+                self.last_edge[pin] = now
+                if callback is not None:
+                    callback(pin)
+        self.levels[pin] = 0
+
+    def play(self, script):
+        """Press pins at the given offsets (seconds) from now in a thread"""
+        def run():
+            start = time.monotonic()
+            for offset, pin in script:
+                delay = start + offset - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self.press(pin)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+
+def open_display(simulate=False, **kwargs):
+    """Create the display backend, importing hardware drivers only when needed"""
+    if simulate:
+        return SimulatedSSD1306(**kwargs)
+    return AdafruitDisplay(**kwargs)
+
+
+def open_mux(simulate=False, **kwargs):
+    """Create the I2C multiplexer, simulated or real"""
+    if simulate:
+        return SimulatedMux(**kwargs)
+    return TCA9548A(**kwargs)
+
+
+def open_gpio(simulate=False):
+    """Return the GPIO module, or a FakeGPIO when simulating"""
+    if simulate:
+        return FakeGPIO()
+    import RPi.GPIO as GPIO
+    return GPIO
@@ -0,0 +1,182 @@
+"""Check that the steady-state frame path stops growing memory and measure GC pauses
+
+Drives a simulated pet frame by frame (input, tick, render, transfer) on a
+clock that advances one tick per frame and never sleeps, first under
+tracemalloc to find memory still held after the frames and the short-lived
+peak inside each one, then with the collector instrumented to time every
+pause. Prints JSON and exits non-zero if any scenario keeps growing.
+
+Frames are not allocation-free: pellet positions, their bounding box and
+the merged damage rects are built fresh each frame, a few KB at most, and
+show up as transient bytes. What must hold is that none of it accumulates.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from core import DigitalPet
+from framebuffer import FrameBuffer, pack_phases
+from hardware import SimulatedSSD1306, FakeGPIO
+from session import TickClock
+
+WARMUP_FRAMES = 1000
+TICK = 0.1  # the pet's default 10 ticks per second
+# Net growth allowed over a whole run, for frames and free lists the
+# interpreter keeps after a code path first runs; a leak of one small
+# object per frame is far past it over the default 5000 frames
+SLACK_BYTES = 8192
+
+
+class Discard:
+    """stdout replacement that keeps nothing, not even a buffer"""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def idle(pet, frame):
+    # Awake but untouched long enough to be at the idle frame rate
+    pet.last_interaction = pet.clock() - pet.ACTIVE_HOLD
+
+
+def sleeping(pet, frame):
+    if frame == 0:
+        pet.last_interaction = pet.clock() - pet.SLEEP_TIMEOUT - 1
+
+
+def feeding(pet, frame):
+    # A pellet every 8 frames keeps a few in flight at all times
+    if frame % 8 == 0:
+        pet.last_interaction = pet.clock()
+        pet.pellets.spawn()
+
+
+SCENARIOS = {"idle": idle, "sleeping": sleeping, "feeding": feeding}
+
+
+def build():
+    """A simulated pet on a clock that moves one tick per frame"""
+    clock = TickClock(0.0, TICK)
+    with contextlib.redirect_stdout(Discard()):
+        pet = DigitalPet(SimulatedSSD1306(sleep=False), FakeGPIO(), pipelined=False, clock=clock)
+    # Keep the random events from firing mid-measurement
+    pet.RANDOM_EVENT_CHANCE = 0.0
+    if isinstance(pet.canvas, FrameBuffer):
+        # Pack every sprite phase up front, as a long run ends up doing anyway,
+        # so the lazily filled cache doesn't read as growth
+        for sprite in list(pet.sprites.sprites.values()) + [pet.pellet_layer.sprite]:
+            for shift in range(8):
+                sprite.packed[shift] = pack_phases(sprite.image, shift)
+    return pet
+
+
+def run_frames(pet, scenario, start, count):
+    for frame in range(start, start + count):
+        scenario(pet, frame)
+        pet.handle_buttons()
+        pet.tick(TICK)
+        pet.update_display()
+        pet.clock.advance()
+
+
+def net_allocations(name, frames):
+    """Bytes and blocks still allocated after the frames, and the per-frame churn"""
+    pet = build()
+    scenario = SCENARIOS[name]
+    churn = []
+    with contextlib.redirect_stdout(Discard()):
+        # Trace the warmup too, so lazily filled caches are already counted
+        tracemalloc.start(1)
+        run_frames(pet, scenario, 0, WARMUP_FRAMES)
+        before = tracemalloc.take_snapshot()
+        for frame in range(WARMUP_FRAMES, WARMUP_FRAMES + frames):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            run_frames(pet, scenario, frame, 1)
+            churn.append(tracemalloc.get_traced_memory()[1] - current)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    diffs = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    grown = [diff for diff in diffs if diff.size_diff > 0]
+    net = sum(diff.size_diff for diff in diffs)
+    return {
+        "net_bytes": net,
+        "net_blocks": sum(diff.count_diff for diff in diffs),
+        "leaking": net > SLACK_BYTES,
+        # Peak of short-lived allocations inside one frame
+        "transient_bytes_mean": round(sum(churn) / frames, 1),
+        "transient_bytes_max": max(churn),
+        "top_growth": [f"{diff.traceback[0].filename.rsplit(os.sep, 1)[-1]}:"
+                       f"{diff.traceback[0].lineno} +{diff.size_diff} B"
+                       for diff in sorted(grown, key=lambda d: -d.size_diff)[:5]],
+    }
+
+
+def gc_pauses(name, frames):
+    """Collections triggered by the frames and how long they stopped the world"""
+    gc.collect()
+    baseline = len(gc.get_objects())
+    pet = build()
+    scenario = SCENARIOS[name]
+    pauses = []
+    started = [0.0]
+
+    def timer(phase, info):
+        if phase == "start":
+            started[0] = time.perf_counter()
+        else:
+            pauses.append(time.perf_counter() - started[0])
+
+    with contextlib.redirect_stdout(Discard()):
+        run_frames(pet, scenario, 0, WARMUP_FRAMES)
+        gc.collect()
+        gc.callbacks.append(timer)
+        try:
+            start = time.perf_counter()
+            run_frames(pet, scenario, WARMUP_FRAMES, frames)
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.callbacks.remove(timer)
+        # What a full collection costs whenever something else triggers one
+        start = time.perf_counter()
+        gc.collect()
+        full = time.perf_counter() - start
+    return {
+        "tracked_objects": len(gc.get_objects()) - baseline,
+        "full_collection_ms": round(full * 1000, 3),
+        "collections": len(pauses),
+        "pause_total_ms": round(sum(pauses) * 1000, 3),
+        "pause_max_ms": round(max(pauses) * 1000, 3) if pauses else 0.0,
+        "frame_us": round(elapsed / frames * 1_000_000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (default: all)")
+    args = parser.parse_args()
+
+    result = {}
+    leaking = False
+    for name in args.scenario or SCENARIOS:
+        allocations = net_allocations(name, args.frames)
+        result[name] = {"allocations": allocations, "gc": gc_pauses(name, args.frames)}
+        leaking = leaking or allocations["leaking"]
+    print(json.dumps(result, indent=2))
+    if leaking:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
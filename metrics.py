@@ -0,0 +1,175 @@
+import json
+import os
+import socket
+import threading
+import time
+
+# Bucket i holds durations in [2^(i-1), 2^i) microseconds, the last one is open
+NUM_BUCKETS = 22
+
+
+class Histogram:
+    """Fixed-size log2 histogram of durations"""
+
+    def __init__(self):
+        self.buckets = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Add one duration, O(1) into a fixed set of buckets"""
+        index = int(seconds * 1_000_000).bit_length()
+        if index >= NUM_BUCKETS:
+            index = NUM_BUCKETS - 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Upper bound (in seconds) of the bucket holding the given fraction"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min((1 << index) / 1_000_000, self.max)
+        return self.max
+
+    def snapshot(self):
+        """Summary in milliseconds"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 4) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 4),
+            "p99_ms": round(self.percentile(0.99) * 1000, 4),
+            "max_ms": round(self.max * 1000, 4),
+            "buckets_us": self.buckets[:],
+        }
+
+
+class Metrics:
+    """Per-stage timing histograms for the main loop"""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.stages = {}
+        self.started = clock()
+        self.record_cost = self.calibrate()
+
+    def calibrate(self, rounds=5000):
+        """Measure what timing one call adds so overhead can be reported"""
+        def noop():
+            pass
+
+        timed = self.timed(Histogram(), noop)
+        clock = self.clock
+        start = clock()
+        for _ in range(rounds):
+            noop()
+        bare = clock() - start
+        start = clock()
+        for _ in range(rounds):
+            timed()
+        wrapped = clock() - start
+        return max(0.0, (wrapped - bare) / rounds)
+
+    def wrap(self, stage, func):
+        """Return func timed into the stage's histogram"""
+        return self.timed(self.stages.setdefault(stage, Histogram()), func)
+
+    def timed(self, histogram, func):
+        """Return func timed into histogram"""
+        clock = self.clock
+
+        def wrapper(*args):
+            start = clock()
+            try:
+                return func(*args)
+            finally:
+                histogram.record(clock() - start)
+        return wrapper
+
+    def snapshot(self):
+        """All histograms plus the measured instrumentation overhead"""
+        elapsed = self.clock() - self.started
+        calls = sum(histogram.count for histogram in self.stages.values())
+        return {
+            "uptime_s": round(elapsed, 3),
+            "stages": {name: histogram.snapshot() for name, histogram in self.stages.items()},
+            "overhead": {
+                "per_call_us": round(self.record_cost * 1_000_000, 3),
+                "fraction": round(calls * self.record_cost / elapsed, 6) if elapsed else 0.0,
+            },
+        }
+
+
+class MetricsExporter:
+    """Publish metrics to a file every interval and/or a Unix socket on request"""
+
+    def __init__(self, collect, path=None, socket_path=None, interval=5.0):
+        self.collect = collect
+        self.path = path
+        self.socket_path = socket_path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.server = None
+        self.threads = []
+
+    def start(self):
+        if self.path:
+            self.spawn(self.write_loop)
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(self.socket_path)
+            self.server.listen(1)
+            self.server.settimeout(0.5)
+            self.spawn(self.serve_loop)
+        return self
+
+    def spawn(self, target):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def render(self):
+        return json.dumps(self.collect(), indent=2) + "\n"
+
+    def write(self):
+        """Atomically replace the metrics file"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, self.path)
+
+    def write_loop(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def serve_loop(self):
+        """Answer every connection with one JSON snapshot"""
+        while not self.stopped.is_set():
+            try:
+                conn, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            with conn:
+                conn.sendall(self.render().encode())
+
+    def stop(self):
+        self.stopped.set()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        if self.path:
+            self.write()
+        if self.server is not None:
+            self.server.close()
+            os.unlink(self.socket_path)
@@ -0,0 +1,341 @@
+"""Run several pets on several SSD1306 displays from one process
+
+Each pet gets its own display (an I2C address, optionally behind a channel
+of a TCA9548A-style mux) and its own three buttons. All pets share one
+fixed-timestep loop for input and simulation, and all frames go through a
+single bus scheduler so the I2C bus is only ever used by one thread.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from core import DigitalPet
+from display import same_frame
+from hardware import open_display, open_gpio, open_mux, MuxChannel
+from persistence import StateStore
+from scheduler import GameLoop, EPSILON
+
+# Button triples (feed, pet, play) for generated configs, avoiding the
+# I2C, SPI and UART pins
+PIN_SETS = [(17, 27, 22), (5, 6, 13), (19, 26, 21), (20, 16, 12), (23, 24, 25), (18, 4, 7)]
+ADDRESSES = (0x3C, 0x3D)
+
+
+class BusPort:
+    """One display's frame slot on the shared bus, in place of a FramePipeline
+
+    Triple buffered like FramePipeline: a newer frame replaces one still
+    waiting for the bus, and a frame identical to the last one is skipped.
+    """
+
+    def __init__(self, scheduler, display, channel):
+        self.scheduler = scheduler
+        self.display = display
+        self.channel = channel
+        shape = (display.pages, display.width)
+        self.back = np.zeros(shape, dtype=np.uint8)
+        self.ready = np.zeros(shape, dtype=np.uint8)
+        self.front = np.zeros(shape, dtype=np.uint8)
+        self.mask = np.zeros(shape, dtype=bool)
+        self.has_ready = False
+        self.latest = None
+
+        # Frame accounting
+        self.rendered = 0
+        self.transferred = 0
+        self.dropped = 0
+        self.skipped = 0
+
+    def submit(self, frame, changed=True):
+        """Copy a finished frame and queue it for the next bus round"""
+        if self.latest is not None and (not changed or same_frame(frame, self.latest, self.mask)):
+            self.skipped += 1
+            return
+        np.copyto(self.back, frame)
+        with self.scheduler.changed:
+            if self.has_ready:
+                self.dropped += 1
+            self.back, self.ready = self.ready, self.back
+            self.latest = self.ready
+            self.has_ready = True
+            self.rendered += 1
+            self.scheduler.changed.notify_all()
+
+    def stop(self):
+        # The host stops the shared scheduler once every pet is done
+        pass
+
+
+class BusScheduler:
+    """Serialize every display transfer on one I2C bus through a writer thread
+
+    Each round takes the newest waiting frame from every port and sends them
+    grouped by mux channel, starting with the channel already selected, so a
+    round costs at most one switch per channel in use. A port whose frame is
+    still waiting when the next one arrives drops the stale frame, so a busy
+    bus lowers every display's rate evenly instead of starving some.
+    """
+
+    def __init__(self, mux=None):
+        self.mux = mux
+        self.ports = []
+        self.running = True
+        self.changed = threading.Condition()
+        self.rounds = 0
+
+        self.thread = threading.Thread(target=self.writer, daemon=True)
+        self.thread.start()
+
+    def port(self, display, channel=None):
+        port = BusPort(self, display, channel)
+        self.ports.append(port)
+        return port
+
+    def order(self, batch):
+        """Current channel first, then the rest in channel order"""
+        current = self.mux.channel if self.mux is not None else None
+        return sorted(batch, key=lambda port: (port.channel != current,
+                                               -1 if port.channel is None else port.channel))
+
+    def writer(self):
+        """Writer thread: one round of transfers per wake-up"""
+        while True:
+            with self.changed:
+                while self.running and not any(port.has_ready for port in self.ports):
+                    self.changed.wait()
+                batch = [port for port in self.ports if port.has_ready]
+                if not batch:
+                    return
+                for port in batch:
+                    port.front, port.ready = port.ready, port.front
+                    port.has_ready = False
+            for port in self.order(batch):
+                port.display.show_frame(port.front)
+                port.transferred += 1
+            with self.changed:
+                self.rounds += 1
+                self.changed.notify_all()
+
+    def stop(self):
+        """Send what is still waiting, then stop the writer thread"""
+        with self.changed:
+            self.running = False
+            self.changed.notify_all()
+        self.thread.join(timeout=2.0)
+
+
+class PetSlot:
+    """Render pacing for one hosted pet, standing in for its own GameLoop"""
+
+    def __init__(self, host, name, pet, channel, addr):
+        self.host = host
+        self.name = name
+        self.pet = pet
+        self.channel = channel
+        self.addr = addr
+        self.render_period = 1.0 / pet.RENDER_FPS
+        self.next_render = 0.0
+        self.requested = True
+
+    def set_render_fps(self, fps):
+        """Change this pet's refresh rate; speeding up takes effect at once"""
+        period = 1.0 / fps
+        if period < self.render_period:
+            self.next_render = min(self.next_render, self.host.loop.clock() + period)
+        self.render_period = period
+
+    def request_render(self):
+        self.requested = True
+        self.host.loop.request_render()
+
+    def render(self, now):
+        """Render if due or requested"""
+        if not self.requested and now < self.next_render - EPSILON:
+            return
+        self.requested = False
+        self.pet.update_display()
+        self.next_render += self.render_period
+        if self.next_render <= now:
+            self.next_render = now + self.render_period
+
+
+class PetHost:
+    """N pets, one loop, one bus"""
+
+    def __init__(self, specs, simulate=False, state_dir=None):
+        self.gpio = open_gpio(simulate)
+        muxed = any(spec.get("channel") is not None for spec in specs)
+        self.mux = open_mux(simulate) if muxed else None
+        self.scheduler = BusScheduler(self.mux)
+        self.wake = threading.Event()
+        self.running = True
+        self.slots = []
+
+        for spec in specs:
+            name = spec["name"]
+            channel = spec.get("channel")
+            addr = spec.get("addr", ADDRESSES[0])
+            if channel is not None:
+                # The driver talks to the panel as soon as it is created
+                self.mux.select(channel)
+            oled = open_display(simulate, addr=addr)
+            if channel is not None:
+                oled = MuxChannel(oled, self.mux, channel)
+            store = StateStore(os.path.join(state_dir, name)) if state_dir else None
+            pet = DigitalPet(oled, self.gpio, store, pipelined=False, buttons=spec.get("buttons"))
+            pet.pipeline = self.scheduler.port(pet.display, channel)
+            pet.buttons.notify = self.wake.set
+            slot = PetSlot(self, name, pet, channel, addr)
+            pet.refresh = slot
+            self.slots.append(slot)
+
+        first = self.slots[0].pet
+        self.loop = GameLoop(tick_rate=first.TICK_RATE, render_fps=first.RENDER_FPS,
+                             wait=self.wait)
+        self.started = None
+        self.elapsed = 0.0
+
+    def wait(self, timeout):
+        """Sleep until the next deadline or any pet's button edge"""
+        self.wake.wait(timeout)
+        self.wake.clear()
+
+    def handle_input(self):
+        for slot in self.slots:
+            slot.pet.handle_buttons()
+
+    def update(self, dt):
+        for slot in self.slots:
+            slot.pet.tick(dt)
+
+    def render(self):
+        now = self.loop.clock()
+        for slot in self.slots:
+            slot.render(now)
+
+    def run(self, duration=None):
+        print(f"Hosting {len(self.slots)} pets! Press Ctrl+C to exit")
+        if duration:
+            timer = threading.Timer(duration, self.stop)
+            timer.daemon = True
+            timer.start()
+        self.started = time.monotonic()
+        try:
+            self.loop.run(self.handle_input, self.update, self.render, lambda: self.running)
+        except KeyboardInterrupt:
+            pass
+        self.elapsed = time.monotonic() - self.started
+        return self.cleanup()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+
+    def report(self):
+        """Per-pet achieved frame rates plus bus statistics"""
+        elapsed = self.elapsed or 1e-9
+        pets = {}
+        for slot in self.slots:
+            port = slot.pet.pipeline
+            pets[slot.name] = {
+                "channel": slot.channel,
+                "addr": hex(slot.addr),
+                # Skipped frames were already on the panel, so they count as shown
+                "fps": round((port.transferred + port.skipped) / elapsed, 2),
+                "transfer_fps": round(port.transferred / elapsed, 2),
+                "transferred": port.transferred,
+                "dropped": port.dropped,
+                "skipped": port.skipped,
+                "bytes_per_frame": round(slot.pet.display.average_bytes(), 1),
+            }
+        return {
+            "duration_s": round(self.elapsed, 3),
+            "pets": pets,
+            "bus_rounds": self.scheduler.rounds,
+            "mux_switches": self.mux.switches if self.mux is not None else 0,
+            "loop": {
+                "ticks": self.loop.ticks,
+                "dropped_ticks": self.loop.dropped_ticks,
+                "late_frames": self.loop.late_frames,
+            },
+        }
+
+    def cleanup(self):
+        """Flush the bus, report, then shut every pet down"""
+        self.running = False
+        self.scheduler.stop()
+        result = self.report()
+        for slot in self.slots:
+            print(f"\n[{slot.name}]")
+            # Every pet's buttons are closed before the shared GPIO goes
+            slot.pet.cleanup(hosted=True)
+        self.gpio.cleanup()
+        print(f"\nLoop: {self.loop.ticks} ticks, {self.loop.dropped_ticks} dropped ticks, "
+              f"{self.loop.late_frames} late frames")
+        print(f"Bus: {result['bus_rounds']} rounds, {result['mux_switches']} mux switches")
+        for name, stats in result["pets"].items():
+            print(f"  {name}: {stats['fps']:.1f} fps, {stats['transfer_fps']:.1f} transfers/s, "
+                  f"{stats['dropped']} dropped")
+        return result
+
+
+def generate_specs(count):
+    """Two displays per bus, one mux channel per pair once there are more than two"""
+    if count > len(PIN_SETS):
+        sys.exit(f"Only {len(PIN_SETS)} button sets are predefined, use --config for more pets")
+    specs = []
+    for index in range(count):
+        feed, pet, play = PIN_SETS[index]
+        specs.append({
+            "name": f"pet{index}",
+            "channel": index // len(ADDRESSES) if count > len(ADDRESSES) else None,
+            "addr": ADDRESSES[index % len(ADDRESSES)],
+            "buttons": {"feed": feed, "pet": pet, "play": play},
+        })
+    return specs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", help="JSON list of pets: name, channel, addr, buttons")
+    parser.add_argument("--pets", type=int, default=2, help="pets to generate without --config")
+    parser.add_argument("--simulate", action="store_true",
+                        help="simulated displays, mux and GPIO")
+    parser.add_argument("--press-rate", type=float, default=0.0,
+                        help="simulated random presses per second per pet")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--state-dir", default="~/.digipet",
+                        help="each pet saves to a subdirectory named after it")
+    parser.add_argument("--no-persist", action="store_true")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    if args.config:
+        with open(args.config) as f:
+            specs = json.load(f)
+    else:
+        specs = generate_specs(args.pets)
+    state_dir = None if args.no_persist else os.path.expanduser(args.state_dir)
+    host = PetHost(specs, args.simulate, state_dir)
+
+    if args.simulate and args.press_rate > 0:
+        rng = np.random.default_rng(0)
+        pins = [pin for slot in host.slots for pin in slot.pet.buttons.pins]
+        horizon = args.duration or 3600.0
+        times = np.cumsum(rng.exponential(1.0 / (args.press_rate * len(host.slots)),
+                                          int(args.press_rate * len(host.slots) * horizon) + 1))
+        host.gpio.play([(float(t), int(rng.choice(pins))) for t in times if t < horizon])
+
+    result = host.run(args.duration)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Mouth hitbox: centre and half-size in pixels
+MOUTH_X, MOUTH_Y = 64, 42
+MOUTH_RADIUS = 5
+
+PELLET_SIZE = 5
+
+
+class PelletPool:
+    """Fixed-capacity particle pool of pellets playing one flight clip
+
+    Each pellet is just a tick index into the clip's compiled x/y tables
+    (see animations.pellet_flight), so stepping, hit-testing and culling are
+    a handful of vectorized operations no matter how many pellets are in
+    flight.
+    """
+
+    def __init__(self, clip, capacity=64):
+        self.xs, self.ys = clip.arrays["x"], clip.arrays["y"]
+        self.length = len(self.xs)
+        self.capacity = capacity
+        self.steps = np.zeros(capacity, dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.live = 0
+        # Bumped whenever a pellet moves, appears or goes away
+        self.version = 0
+
+        # Scratch buffers so a step allocates no arrays
+        self.clamped = np.zeros(capacity, dtype=np.int32)
+        self.hits = np.zeros(capacity, dtype=bool)
+
+        # Rounded draw positions, so drawing does no float math
+        self.draw_xs = np.rint(self.xs).astype(np.int32)
+        self.draw_ys = np.rint(self.ys).astype(np.int32)
+
+        # Which trajectory steps are inside the mouth hitbox
+        self.in_mouth = ((np.abs(self.xs - MOUTH_X) < MOUTH_RADIUS)
+                         & (np.abs(self.ys - MOUTH_Y) < MOUTH_RADIUS))
+
+        self.sprite = Image.new("1", (PELLET_SIZE, PELLET_SIZE))
+        ImageDraw.Draw(self.sprite).ellipse((0, 0, PELLET_SIZE - 1, PELLET_SIZE - 1), fill=255)
+
+        self.spawned = 0
+        self.eaten = 0
+        self.recycled = 0
+
+    def spawn(self):
+        """Launch a new pellet, recycling the oldest one if the pool is full"""
+        free = np.flatnonzero(~self.active)
+        if len(free):
+            slot = free[0]
+            self.live += 1
+        else:
+            slot = int(np.argmax(self.steps))
+            self.recycled += 1
+        self.steps[slot] = 0
+        self.active[slot] = True
+        self.spawned += 1
+        self.version += 1
+
+    def any_active(self):
+        return self.live > 0
+
+    def step(self):
+        """Advance every pellet one tick and return how many were eaten"""
+        if not self.live:
+            return 0
+        # Inactive slots add False, so only live pellets advance
+        np.add(self.steps, self.active, out=self.steps)
+        np.less(self.steps, self.length, out=self.hits)
+        np.logical_and(self.active, self.hits, out=self.active)
+        np.minimum(self.steps, self.length - 1, out=self.clamped)
+        np.take(self.in_mouth, self.clamped, out=self.hits)
+        np.logical_and(self.hits, self.active, out=self.hits)
+        count = np.count_nonzero(self.hits)
+        if count:
+            np.logical_xor(self.active, self.hits, out=self.active)
+            self.eaten += count
+        self.live = np.count_nonzero(self.active)
+        self.version += 1
+        return count
+
+    def positions(self):
+        """Draw positions of every live pellet as (x, y) tuples"""
+        steps = self.steps[self.active]
+        return list(zip(self.draw_xs[steps].tolist(), self.draw_ys[steps].tolist()))
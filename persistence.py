@@ -0,0 +1,247 @@
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+# Journal event codes
+SNAPSHOT = 0
+FEED = 1
+PET = 2
+PLAY = 3
+EATEN = 4
+HUNGRY = 5
+WAKE = 6
+SLEEP = 7
+
+EVENTS = {"feed": FEED, "pet": PET, "play": PLAY, "eaten": EATEN,
+          "hungry": HUNGRY, "wake": WAKE, "sleep": SLEEP}
+
+# code, wall time, hunger, happiness, last interaction, sleeping
+RECORD = struct.Struct("<BdffdB")
+CRC = struct.Struct("<I")
+RECORD_SIZE = RECORD.size + CRC.size
+
+SNAPSHOT_MAGIC = b"DPET"
+SNAPSHOT_VERSION = 1
+
+
+class PetState:
+    """The part of a DigitalPet that survives restarts"""
+
+    __slots__ = ("timestamp", "hunger", "happiness", "last_interaction", "is_sleeping")
+
+    def __init__(self, timestamp, hunger, happiness, last_interaction, is_sleeping):
+        self.timestamp = timestamp
+        self.hunger = hunger
+        self.happiness = happiness
+        self.last_interaction = last_interaction
+        self.is_sleeping = is_sleeping
+
+
+def pack_record(code, state):
+    """Encode one CRC-protected journal record"""
+    body = RECORD.pack(code, state.timestamp, state.hunger, state.happiness,
+                       state.last_interaction, state.is_sleeping)
+    return body + CRC.pack(zlib.crc32(body))
+
+
+def unpack_record(data):
+    """Decode a record, returning None if it is torn or corrupt"""
+    if len(data) < RECORD_SIZE:
+        return None
+    body = data[:RECORD.size]
+    (crc,) = CRC.unpack_from(data, RECORD.size)
+    if zlib.crc32(body) != crc:
+        return None
+    code, timestamp, hunger, happiness, last_interaction, sleeping = RECORD.unpack(body)
+    return code, PetState(timestamp, hunger, happiness, last_interaction, bool(sleeping))
+
+
+class StateStore:
+    """Crash-safe pet state: a snapshot file plus an append-only journal
+
+    All disk I/O happens on a background writer thread, the render loop only
+    enqueues a few dozen bytes per stat-changing event. Journal writes are
+    fsynced in batches at most every fsync_interval seconds and a fresh
+    snapshot (which truncates the journal) is taken at most every
+    snapshot_interval seconds or once the journal grows past max_journal
+    bytes, which bounds how often each flash block gets rewritten.
+    """
+
+    def __init__(self, directory, fsync_interval=5.0, snapshot_interval=300.0,
+                 max_journal=64 * 1024):
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.snapshot_path = os.path.join(self.directory, "state.snap")
+        self.journal_path = os.path.join(self.directory, "state.journal")
+        self.fsync_interval = fsync_interval
+        self.snapshot_interval = snapshot_interval
+        self.max_journal = max_journal
+
+        self.queue = queue.SimpleQueue()
+        self.last_snapshot = time.monotonic()
+        # A snapshot is queued and the writer hasn't finished it yet
+        self.snapshot_pending = False
+        self.journal = None
+        self.journal_size = 0
+        # Where the last good journal record ends, as found by load()
+        self.journal_end = None
+        self.thread = None
+
+        # Write accounting
+        self.records = 0
+        self.snapshots = 0
+        self.fsyncs = 0
+        self.bytes_written = 0
+        self.load_time = 0.0
+
+    def load(self):
+        """Return the latest consistent PetState, or None for a fresh pet"""
+        start = time.perf_counter()
+        latest = None
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                data = f.read()
+            header = SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION])
+            if data.startswith(header):
+                record = unpack_record(data[len(header):])
+                if record is not None:
+                    latest = record[1]
+        except FileNotFoundError:
+            pass
+
+        self.journal_end = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                data = f.read()
+            for offset in range(0, len(data), RECORD_SIZE):
+                record = unpack_record(data[offset:offset + RECORD_SIZE])
+                if record is None:
+                    break  # torn or corrupt tail from a power cut
+                self.journal_end = offset + RECORD_SIZE
+                # A crash between snapshot and truncation leaves older records
+                if latest is None or record[1].timestamp >= latest.timestamp:
+                    latest = record[1]
+        except FileNotFoundError:
+            pass
+
+        self.load_time = time.perf_counter() - start
+        return latest
+
+    def start(self):
+        """Open the journal and start the writer thread"""
+        self.journal = open(self.journal_path, "ab")
+        self.journal_size = self.journal.tell()
+        # Drop everything after the last good record, so new records are
+        # neither misaligned nor hidden behind a corrupt one
+        if self.journal_end is not None:
+            end = self.journal_end
+        else:
+            end = self.journal_size - self.journal_size % RECORD_SIZE
+        if end != self.journal_size:
+            self.journal_size = end
+            self.journal.truncate(end)
+        self.thread = threading.Thread(target=self.writer, daemon=True)
+        self.thread.start()
+        return self
+
+    def append(self, event, state):
+        """Journal a stat-changing event (never blocks on disk)"""
+        self.queue.put(("record", pack_record(EVENTS[event], state)))
+
+    def snapshot(self, state):
+        """Write a full snapshot and start a fresh journal"""
+        self.last_snapshot = time.monotonic()
+        self.snapshot_pending = True
+        self.queue.put(("snapshot", pack_record(SNAPSHOT, state)))
+
+    def snapshot_due(self):
+        """Whether the interval has passed or the journal got large
+
+        Never while a snapshot is still queued: the journal only shrinks once
+        the writer gets to it, and a slow fsync would otherwise queue one
+        more snapshot every tick until then.
+        """
+        if self.snapshot_pending:
+            return False
+        return (time.monotonic() - self.last_snapshot >= self.snapshot_interval
+                or self.journal_size >= self.max_journal)
+
+    def snapshot_delay(self):
+        """Seconds until snapshot_due() turns true if nothing more is journalled"""
+        if self.journal_size >= self.max_journal and not self.snapshot_pending:
+            return 0.0
+        return max(0.0, self.snapshot_interval - (time.monotonic() - self.last_snapshot))
+
+    def writer(self):
+        """Background thread: apply queued writes, fsync in batches"""
+        dirty = False
+        last_sync = time.monotonic()
+        while True:
+            timeout = None
+            if dirty:
+                timeout = max(0.0, self.fsync_interval - (time.monotonic() - last_sync))
+            try:
+                kind, data = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                kind = None
+
+            if kind == "record":
+                self.journal.write(data)
+                self.journal_size += len(data)
+                self.records += 1
+                self.bytes_written += len(data)
+                dirty = True
+            elif kind == "snapshot":
+                self.write_snapshot(data)
+                self.snapshot_pending = False
+                dirty = False
+                last_sync = time.monotonic()
+            elif kind == "stop":
+                if dirty:
+                    self.sync()
+                self.journal.close()
+                return
+
+            if dirty and time.monotonic() - last_sync >= self.fsync_interval:
+                self.sync()
+                dirty = False
+                last_sync = time.monotonic()
+
+    def sync(self):
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.fsyncs += 1
+
+    def write_snapshot(self, record):
+        """Atomically replace the snapshot, then truncate the journal"""
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION]) + record)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+        # Everything journalled so far is covered by the snapshot
+        self.journal.seek(0)
+        self.journal.truncate()
+        self.journal_size = 0
+        self.snapshots += 1
+        self.fsyncs += 2
+        self.bytes_written += len(record) + len(SNAPSHOT_MAGIC) + 1
+
+    def close(self, state):
+        """Final snapshot, then stop the writer thread"""
+        if self.thread is None:
+            return
+        self.snapshot(state)
+        self.queue.put(("stop", None))
+        self.thread.join(timeout=5.0)
+        self.thread = None
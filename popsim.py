@@ -0,0 +1,240 @@
+"""Simulate a whole population of pets at once for tuning decay and events
+
+Every pet is a slot in a set of NumPy arrays and each step applies the rules
+of DigitalPet (stat decay, check_sleep, check_random_events, handle_press
+and get_mood) to all of them in batched form. Owners press buttons following
+synthetic interaction patterns. The output is the share of pet-time spent in
+each mood, overall and per pattern, as JSON.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+MOODS = ("Happy!", "Content", "Unhappy", "Miserable")
+BUTTONS = ("feed", "pet", "play")
+FEED, PET, PLAY = range(len(BUTTONS))
+
+# Owner behaviour: presses per hour while awake, and whether they sleep at night
+PATTERNS = {
+    "attentive": (12.0, False),
+    "casual": (3.0, True),
+    "neglectful": (0.5, True),
+}
+
+
+class Params:
+    """Tunable rules, defaults matching DigitalPet"""
+
+    def __init__(self, hunger_decay=5, happiness_decay=7, sleep_timeout=120,
+                 event_chance=0.01, event_hunger=20, feed=15, pet=15,
+                 play_hunger=5, play_happiness=10):
+        self.hunger_decay = hunger_decay        # per minute
+        self.happiness_decay = happiness_decay  # per minute
+        self.sleep_timeout = sleep_timeout      # seconds without interaction
+        self.event_chance = event_chance        # per 0.1 s of awake time
+        self.event_hunger = event_hunger
+        self.feed = feed
+        self.pet = pet
+        self.play_hunger = play_hunger
+        self.play_happiness = play_happiness
+
+
+class Population:
+    """Hunger, happiness and sleep state for many pets as arrays"""
+
+    def __init__(self, count, params, patterns=PATTERNS, seed=0):
+        self.count = count
+        self.params = params
+        self.rng = np.random.default_rng(seed)
+
+        self.hunger = np.full(count, 100.0, dtype=np.float32)
+        self.happiness = np.full(count, 100.0, dtype=np.float32)
+        self.idle = np.zeros(count, dtype=np.float32)
+        self.sleeping = np.zeros(count, dtype=bool)
+
+        # Split pets into equal contiguous blocks, one per interaction pattern
+        self.pattern_names = list(patterns)
+        self.pattern = np.arange(count) * len(self.pattern_names) // count
+        bounds = np.searchsorted(self.pattern, np.arange(len(self.pattern_names) + 1))
+        self.blocks = [slice(start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+        self.press_rate = [patterns[name][0] / 3600.0 for name in self.pattern_names]
+        self.owner_sleeps = [patterns[name][1] for name in self.pattern_names]
+
+        # Seconds spent in each mood, per pattern
+        self.mood_time = np.zeros((len(self.pattern_names), len(MOODS)))
+        self.asleep_time = np.zeros(len(self.pattern_names))
+        self.elapsed = 0.0
+
+        # Random events are a Poisson process with the per-check chance as rate
+        self.event_rate = -np.log1p(-params.event_chance) / 0.1
+        self.event_cdf = None
+        self.event_dt = None
+
+    def poisson_table(self, mean):
+        """Cumulative Poisson probabilities up to where the tail is negligible"""
+        counts = np.arange(int(mean + 10 * np.sqrt(mean) + 10))
+        log_pmf = counts * np.log(mean) - mean - np.cumsum(np.log(np.maximum(counts, 1)))
+        cdf = np.cumsum(np.exp(log_pmf))
+        return cdf[cdf < 1 - 1e-7].astype(np.float32)
+
+    def sample_presses(self, dt, clock):
+        """Indices of pets pressed this step, repeated once per press"""
+        hour = (clock / 3600.0) % 24
+        night = hour < 8 or hour >= 22
+        picked = []
+        for index, block in enumerate(self.blocks):
+            if night and self.owner_sleeps[index]:
+                continue
+            # Total presses in the block, spread uniformly over its pets
+            size = block.stop - block.start
+            total = self.rng.poisson(self.press_rate[index] * dt * size)
+            if total:
+                picked.append(self.rng.integers(block.start, block.stop, size=total))
+        if not picked:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(picked)
+
+    def sample_events(self, dt, count):
+        """Sudden-hunger events for count pets over dt seconds"""
+        if self.event_dt != dt:
+            self.event_cdf = self.poisson_table(self.event_rate * dt)
+            self.event_dt = dt
+        # Inverse CDF sampling; a few vector compares beat rng.poisson here
+        uniform = self.rng.random(count, dtype=np.float32)
+        events = np.zeros(count, dtype=np.float32)
+        for threshold in self.event_cdf:
+            events += uniform > threshold
+        return events
+
+    def apply_presses(self, pressed, buttons):
+        """handle_press for each pet index in pressed with the BUTTONS index in buttons
+
+        A pet's presses are applied in the order given, clamping after each
+        one as handle_press does, so a stat that saturates partway through
+        ends where the pet's would. The first press on a sleeping pet only
+        wakes it.
+        """
+        p = self.params
+        order = np.argsort(pressed, kind="stable")
+        pressed = pressed[order]
+        buttons = buttons[order]
+        # Rank of each press among its pet's presses
+        starts = np.flatnonzero(np.r_[True, pressed[1:] != pressed[:-1]])
+        rank = np.arange(len(pressed)) - np.repeat(starts, np.diff(np.r_[starts, len(pressed)]))
+        acting = ~(self.sleeping[pressed] & (rank == 0))
+        # One press per pet per round, so each round is a plain fancy-index update
+        for round_ in range(int(rank.max()) + 1):
+            this_round = acting & (rank == round_)
+            who = pressed[this_round]
+            button = buttons[this_round]
+            # Pellets are credited at once rather than when the flight ends
+            fed = who[button == FEED]
+            self.hunger[fed] = np.minimum(100, self.hunger[fed] + p.feed)
+            petted = who[button == PET]
+            self.happiness[petted] = np.minimum(100, self.happiness[petted] + p.pet)
+            played = who[button == PLAY]
+            self.hunger[played] = np.maximum(0, self.hunger[played] - p.play_hunger)
+            self.happiness[played] = np.minimum(100, self.happiness[played] + p.play_happiness)
+        self.idle[pressed] = 0.0
+
+    def step(self, dt, clock):
+        """Advance every pet by dt seconds; clock is seconds since midnight"""
+        p = self.params
+        rng = self.rng
+
+        # update_stats; the stats are clamped as they decay, before any press
+        self.hunger -= p.hunger_decay * dt / 60.0
+        self.happiness -= p.happiness_decay * dt / 60.0
+        np.maximum(self.hunger, 0, out=self.hunger)
+        np.maximum(self.happiness, 0, out=self.happiness)
+
+        # Owner presses are rare, so only the pressed pets are touched
+        self.idle += dt
+        pressed = self.sample_presses(dt, clock)
+        if len(pressed):
+            self.apply_presses(pressed, rng.integers(0, len(BUTTONS), len(pressed)))
+
+        # check_sleep
+        self.sleeping = self.idle > p.sleep_timeout
+
+        # check_random_events, only while awake
+        awake = np.flatnonzero(~self.sleeping)
+        if len(awake):
+            self.hunger[awake] -= p.event_hunger * self.sample_events(dt, len(awake))
+            # Presses already clamped at 100, events only take hunger away
+            np.maximum(self.hunger, 0, out=self.hunger)
+
+        # get_mood
+        average = (self.hunger + self.happiness) / 2
+        for index, block in enumerate(self.blocks):
+            values = average[block]
+            above_75 = np.count_nonzero(values > 75)
+            above_50 = np.count_nonzero(values > 50)
+            above_25 = np.count_nonzero(values > 25)
+            counts = (above_75, above_50 - above_75, above_25 - above_50, len(values) - above_25)
+            self.mood_time[index] += dt * np.array(counts)
+            self.asleep_time[index] += dt * np.count_nonzero(self.sleeping[block])
+        self.elapsed += dt
+
+    def report(self):
+        """Mood distribution overall and per interaction pattern"""
+        total = self.mood_time.sum()
+        result = {
+            "pets": self.count,
+            "simulated_days": round(self.elapsed / 86400, 3),
+            "mean_hunger": round(float(self.hunger.mean()), 2),
+            "mean_happiness": round(float(self.happiness.mean()), 2),
+            "mood_share": {
+                mood: round(float(self.mood_time[:, i].sum() / total), 4)
+                for i, mood in enumerate(MOODS)
+            },
+            "patterns": {},
+        }
+        for index, name in enumerate(self.pattern_names):
+            pet_time = self.mood_time[index].sum()
+            result["patterns"][name] = {
+                "mood_share": {
+                    mood: round(float(self.mood_time[index, i] / pet_time), 4)
+                    for i, mood in enumerate(MOODS)
+                },
+                "asleep_share": round(float(self.asleep_time[index] / pet_time), 4),
+                "pets": int(self.blocks[index].stop - self.blocks[index].start),
+            }
+        return result
+
+
+def simulate(pets, days, dt, params, seed=0):
+    """Run the population for the given number of days"""
+    population = Population(pets, params, seed=seed)
+    steps = int(days * 86400 / dt)
+    for step in range(steps):
+        population.step(dt, step * dt)
+    return population
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pets", type=int, default=20000)
+    parser.add_argument("--days", type=float, default=2.0)
+    parser.add_argument("--dt", type=float, default=10.0, help="seconds per step")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hunger-decay", type=float, default=5)
+    parser.add_argument("--happiness-decay", type=float, default=7)
+    parser.add_argument("--sleep-timeout", type=float, default=120)
+    parser.add_argument("--event-chance", type=float, default=0.01,
+                        help="chance of sudden hunger per 0.1 s awake")
+    args = parser.parse_args()
+
+    params = Params(args.hunger_decay, args.happiness_decay, args.sleep_timeout,
+                    args.event_chance)
+    start = time.perf_counter()
+    population = simulate(args.pets, args.days, args.dt, params, args.seed)
+    result = population.report()
+    result["wall_time_s"] = round(time.perf_counter() - start, 2)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Sampling profiler for a running pet, toggled by signals
+
+kill -USR1 <pid> starts sampling the stacks of the main loop thread and the
+frame writer thread from a background thread; kill -USR2 <pid> stops and
+writes what was seen as collapsed stacks ("thread;outer;...;leaf count" per
+line), which flamegraph.pl, inferno or speedscope turn into a flame graph.
+A run that is never stopped writes its profile after MAX_DURATION anyway.
+
+Nothing is traced: each sample reads sys._current_frames() and walks the
+wanted threads' frames, caching one label per code object. A sample of two
+threads costs up to about 0.1 ms, during which the sampler holds the GIL
+and the pet's threads wait. The sampler times every sample and stretches
+its interval so that it is busy at most max_overhead (1% by default) of
+the time, whatever rate was asked for; the achieved rate and overhead are
+printed when the profile is written. Distinct stacks are capped at
+MAX_STACKS so memory stays bounded on a long run.
+"""
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+# Threads sampled unless others are asked for: the main loop (input, ticks,
+# animation, rendering) and the pipeline's transfer thread
+THREADS = ("MainThread", "frame-writer")
+
+# Longest a profile runs before it is written without a SIGUSR2
+MAX_DURATION = 600.0
+# Distinct stacks kept; samples of any new stack past this are lumped together
+MAX_STACKS = 10000
+# Seconds between refreshes of which thread ident is which
+THREAD_REFRESH = 1.0
+
+
+class SamplingProfiler:
+    """Start/stop sampling on SIGUSR1/SIGUSR2 and write collapsed stacks"""
+
+    def __init__(self, directory, rate=100.0, threads=THREADS, max_overhead=0.01):
+        self.directory = os.path.expanduser(directory)
+        self.interval = 1.0 / rate
+        self.threads = threads
+        self.max_overhead = max_overhead
+        self.labels = {}  # code object -> "function (file:line)"
+        self.thread = None
+        self.stopping = threading.Event()
+
+        # Last run's accounting
+        self.samples = 0
+        self.busy = 0.0
+        self.elapsed = 0.0
+        self.path = None
+
+    def install(self):
+        """Hook the signals up (call from the main thread)"""
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.start())
+        signal.signal(signal.SIGUSR2, lambda signum, frame: self.stop())
+        return self
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Ask the sampler to finish; it writes the profile on its way out"""
+        self.stopping.set()
+
+    def close(self):
+        """Stop and wait for the profile to be written, e.g. on exit"""
+        self.stop()
+        if self.thread is not None:
+            self.thread.join()
+
+    def label(self, code):
+        label = self.labels.get(code)
+        if label is None:
+            label = self.labels[code] = (f"{code.co_name} "
+                                         f"({os.path.basename(code.co_filename)}:"
+                                         f"{code.co_firstlineno})")
+        return label
+
+    def run(self):
+        """Sampler thread: sample until stopped or MAX_DURATION, then write"""
+        stacks = Counter()
+        idents = {}
+        refreshed = 0.0
+        self.samples = 0
+        self.busy = 0.0
+        start = time.perf_counter()
+        clock = time.perf_counter
+        while True:
+            began = clock()
+            if began - start > MAX_DURATION:
+                break
+            if began - refreshed > THREAD_REFRESH:
+                idents = {thread.ident: thread.name for thread in threading.enumerate()
+                          if self.threads is None or thread.name in self.threads}
+                idents.pop(threading.get_ident(), None)
+                refreshed = began
+            for ident, frame in sys._current_frames().items():
+                name = idents.get(ident)
+                if name is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self.label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(name)
+                key = tuple(reversed(stack))
+                if key not in stacks and len(stacks) >= MAX_STACKS:
+                    key = (name, "[more stacks than MAX_STACKS]")
+                stacks[key] += 1
+            self.samples += 1
+            cost = clock() - began
+            self.busy += cost
+            # Sleep long enough that sampling stays under max_overhead
+            delay = max(self.interval - cost, cost * (1 - self.max_overhead) / self.max_overhead)
+            if self.stopping.wait(delay):
+                break
+        self.elapsed = time.perf_counter() - start
+        self.write(stacks)
+
+    def write(self, stacks):
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory,
+                                 time.strftime("profile-%Y%m%d-%H%M%S.folded"))
+        rate = self.samples / self.elapsed if self.elapsed else 0.0
+        overhead = 100 * self.busy / self.elapsed if self.elapsed else 0.0
+        with open(self.path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+        print(f"Profile: {self.samples} samples at {rate:.1f} Hz "
+              f"({overhead:.2f}% overhead) written to {self.path}")
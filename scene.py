@@ -0,0 +1,214 @@
+from sprites import Sprite
+
+
+def overlaps(a, b):
+    """Whether two (x0, y0, x1, y1) rectangles, end-exclusive, intersect"""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def touches(a, b):
+    """Whether two rectangles overlap or share a stretch of edge (not just a corner)"""
+    if not (a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]):
+        return False
+    return a[0] < b[2] and b[0] < a[2] or a[1] < b[3] and b[1] < a[3]
+
+
+def union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def merge_rects(rects):
+    """Merge touching rectangles until no two overlap or share an edge"""
+    merged = []
+    for rect in rects:
+        # A grown rectangle can swallow earlier ones, so keep folding
+        while True:
+            for index, other in enumerate(merged):
+                if touches(rect, other):
+                    rect = union(rect, merged.pop(index))
+                    break
+            else:
+                break
+        merged.append(rect)
+    return merged
+
+
+class Widget:
+    """Something drawn into the scene inside a bounding box
+
+    Subclasses call changed() with their old and new boxes whenever their
+    state moves, and draw() must only OR pixels on (white on black) through
+    the canvas, so a widget can be redrawn whole without clipping to the
+    damaged area.
+    """
+
+    __slots__ = ("scene",)
+
+    def __init__(self):
+        self.scene = None
+
+    def bbox(self):
+        """(x0, y0, x1, y1) end-exclusive, or None when hidden"""
+        raise NotImplementedError
+
+    def draw(self, canvas):
+        raise NotImplementedError
+
+    def changed(self, old_bbox):
+        """Damage where the widget was and where it is now"""
+        if self.scene is None:
+            return
+        if old_bbox is not None:
+            self.scene.damage(old_bbox)
+        new_bbox = self.bbox()
+        if new_bbox is not None:
+            self.scene.damage(new_bbox)
+
+
+class SpriteWidget(Widget):
+    """One atlas sprite at a position, or hidden"""
+
+    __slots__ = ("sprite", "x", "y")
+
+    def __init__(self):
+        super().__init__()
+        self.sprite = None
+        self.x = 0
+        self.y = 0
+
+    def bbox(self):
+        if self.sprite is None:
+            return None
+        return (self.x, self.y, self.x + self.sprite.width, self.y + self.sprite.height)
+
+    def show(self, sprite, x, y):
+        # Atlas sprites are cached, so identity means same pixels; plain
+        # coordinates keep the unchanged case free of tuple allocations
+        if sprite is self.sprite and x == self.x and y == self.y:
+            return
+        old_bbox = self.bbox()
+        self.sprite = sprite
+        self.x = int(x)
+        self.y = int(y)
+        self.changed(old_bbox)
+
+    def hide(self):
+        if self.sprite is None:
+            return
+        old_bbox = self.bbox()
+        self.sprite = None
+        self.changed(old_bbox)
+
+    def draw(self, canvas):
+        canvas.blit(self.sprite, (self.x, self.y))
+
+
+class PelletLayer(Widget):
+    """Every pellet in flight, damaged as the bounding box of the whole group"""
+
+    __slots__ = ("pellets", "sprite", "size", "positions", "version", "visible")
+
+    def __init__(self, pellets):
+        super().__init__()
+        self.pellets = pellets
+        self.sprite = Sprite("pellet", pellets.sprite)
+        self.size = pellets.sprite.size
+        self.positions = []
+        # Pool version the positions were taken at
+        self.version = -1
+        self.visible = True
+
+    def bbox(self):
+        if not self.positions:
+            return None
+        xs = [x for x, _ in self.positions]
+        ys = [y for _, y in self.positions]
+        return (min(xs), min(ys), max(xs) + self.size[0], max(ys) + self.size[1])
+
+    def update(self, visible=True):
+        # Nothing moved since the last look, so skip building a position list
+        if visible == self.visible and self.pellets.version == self.version:
+            return
+        self.visible = visible
+        self.version = self.pellets.version
+        positions = self.pellets.positions() if visible else []
+        if positions == self.positions:
+            return
+        old_bbox = self.bbox()
+        self.positions = positions
+        self.changed(old_bbox)
+
+    def draw(self, canvas):
+        for position in self.positions:
+            canvas.blit(self.sprite, position)
+
+
+class Scene:
+    """Retained-mode compositor that only clears and redraws damaged rectangles
+
+    Widgets report damage as their state changes; compose() merges the
+    damaged rectangles, clears them and redraws just the widgets touching
+    them, so a frame where nothing moved costs nothing and a frame where
+    one label changed only repaints that label.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.width = canvas.width
+        self.height = canvas.height
+        self.widgets = []
+        self.pending = []
+
+        # Damage accounting, in pixels
+        self.last_damage = 0
+        self.total_damage = 0
+        self.frames = 0
+
+        self.invalidate()
+
+    def add(self, widget):
+        widget.scene = self
+        self.widgets.append(widget)
+        widget.changed(None)
+        return widget
+
+    def damage(self, rect):
+        """Mark a rectangle for redraw, clipped to the screen"""
+        x0, y0 = max(0, rect[0]), max(0, rect[1])
+        x1, y1 = min(self.width, rect[2]), min(self.height, rect[3])
+        if x0 < x1 and y0 < y1:
+            self.pending.append((x0, y0, x1, y1))
+
+    def invalidate(self):
+        """Redraw everything on the next compose"""
+        self.pending = [(0, 0, self.width, self.height)]
+
+    def compose(self):
+        """Repaint the damaged rectangles and return them"""
+        self.frames += 1
+        if not self.pending:
+            # The common idle frame: no lists, no clearing, no redraws
+            self.last_damage = 0
+            return ()
+        rects = merge_rects(self.pending)
+        self.pending = []
+
+        area = 0
+        for rect in rects:
+            self.canvas.clear_rect(rect)
+            area += (rect[2] - rect[0]) * (rect[3] - rect[1])
+        if rects:
+            for widget in self.widgets:
+                bbox = widget.bbox()
+                if bbox is not None and any(overlaps(bbox, rect) for rect in rects):
+                    widget.draw(self.canvas)
+
+        self.last_damage = area
+        self.total_damage += area
+        return rects
+
+    def average_damage(self):
+        """Average damaged pixels per composed frame so far"""
+        if not self.frames:
+            return 0
+        return self.total_damage / self.frames
@@ -0,0 +1,126 @@
+import time
+
+# Slack for float error when comparing accumulated time against dt
+EPSILON = 1e-9
+# Longest a tickless loop blocks without a tick, whatever quiet() says
+MAX_IDLE = 60.0
+
+
+class GameLoop:
+    """Fixed-timestep simulation with an independent render rate
+
+    The simulation always advances in steps of exactly 1/tick_rate seconds,
+    catching up through an accumulator when a frame ran long. Rendering runs
+    on its own absolute deadlines so sleeping never drifts. Input is handled
+    on every wake-up; passing a wait function that returns early on a button
+    edge makes input latency independent of both rates. The render rate can
+    be changed while running, and request_render() forces a frame on the
+    next pass regardless of the schedule.
+
+    Setting quiet and skip makes the loop tickless while nothing happens:
+    quiet() says how many upcoming ticks would change nothing, and instead
+    of waking for each of them the loop blocks until the first one that
+    does (or input), then hands the ones in between to skip(count) in one
+    call. No render falls due in between either, since nothing changed.
+    """
+
+    def __init__(self, tick_rate=10, render_fps=10, max_catchup=5,
+                 clock=time.monotonic, wait=time.sleep):
+        self.dt = 1.0 / tick_rate
+        self.render_period = 1.0 / render_fps
+        self.max_catchup = max_catchup
+        self.clock = clock
+        self.wait = wait
+        self.next_render = None
+        self.render_requested = False
+        # Optional tickless hooks, see above
+        self.quiet = None
+        self.skip = None
+
+        # Loop statistics
+        self.ticks = 0
+        self.frames = 0
+        self.dropped_ticks = 0
+        self.late_frames = 0
+        self.missed_deadlines = 0
+        self.wakeups = 0
+        self.skipped_ticks = 0
+
+    def set_render_fps(self, fps):
+        """Change the render rate; speeding up takes effect immediately"""
+        period = 1.0 / fps
+        if period < self.render_period and self.next_render is not None:
+            self.next_render = min(self.next_render, self.clock() + period)
+        self.render_period = period
+
+    def request_render(self):
+        """Render on the next pass through the loop, even if not due"""
+        self.render_requested = True
+
+    def run(self, handle_input, update, render, running):
+        """Run until running() returns False"""
+        previous = self.clock()
+        self.next_render = previous
+        accumulator = 0.0
+        # Ticks quiet() promised before the loop last blocked
+        idle_ticks = 0
+
+        while running():
+            now = self.clock()
+            accumulator += now - previous
+            previous = now
+            self.wakeups += 1
+
+            if idle_ticks:
+                # Quiet ticks that passed while blocked are applied in one go,
+                # before any input that arrived after them
+                pending = int(accumulator / self.dt + EPSILON)
+                count = min(pending - 1, idle_ticks)
+                idle_ticks = 0
+                if count > 0:
+                    self.skip(count)
+                    accumulator -= count * self.dt
+                    self.ticks += count
+                    self.skipped_ticks += count
+
+            handle_input()
+
+            steps = 0
+            while accumulator >= self.dt - EPSILON and steps < self.max_catchup:
+                update(self.dt)
+                accumulator -= self.dt
+                steps += 1
+            self.ticks += steps
+            if accumulator >= self.dt - EPSILON:
+                # Too far behind, drop the backlog instead of spiralling
+                dropped = int(accumulator / self.dt + EPSILON)
+                self.dropped_ticks += dropped
+                accumulator -= dropped * self.dt
+
+            due = now >= self.next_render - EPSILON
+            if due or self.render_requested:
+                self.render_requested = False
+                render()
+                self.frames += 1
+                if not due:
+                    # Out-of-schedule frame, restart the period from here
+                    self.next_render = now + self.render_period
+                else:
+                    self.next_render += self.render_period
+                    if self.clock() > self.next_render:
+                        # Frame took longer than its whole budget
+                        self.missed_deadlines += 1
+                    if self.next_render <= now:
+                        # Missed a whole period, resync rather than burst
+                        self.late_frames += 1
+                        self.next_render = now + self.render_period
+
+            next_tick = now + (self.dt - accumulator)
+            if self.quiet is not None and not self.render_requested:
+                idle_ticks = min(self.quiet(), int(MAX_IDLE / self.dt))
+                if idle_ticks > 0:
+                    next_tick += idle_ticks * self.dt
+                    self.next_render = max(self.next_render, next_tick)
+            timeout = min(next_tick, self.next_render) - self.clock()
+            if timeout > 0:
+                self.wait(timeout)
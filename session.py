@@ -0,0 +1,279 @@
+"""Record a pet session and replay it deterministically against the simulated display
+
+While recording, the pet's wall clock only moves with the simulation tick and
+random events come from a seeded RNG, so the whole session is determined by
+the seed, the starting stats and which tick each button press landed on.
+Those go to a compact binary file together with a CRC of every rendered
+frame. Replaying feeds the same presses in on the same ticks, either in real
+time or as fast as possible on a virtual clock, and checks every frame
+against the recording. Prints a JSON report and exits non-zero on mismatch.
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import struct
+import sys
+import time
+import zlib
+
+from core import DigitalPet
+from hardware import SimulatedSSD1306, FakeGPIO
+
+MAGIC = b"DPSR"
+VERSION = 3
+
+# magic, version, seed, dt, start time, hunger, happiness, sleeping, idle seconds
+HEADER = struct.Struct("<4sBIddddBd")
+# kind, tick, value (button code or frame CRC)
+RECORD = struct.Struct("<BII")
+
+PRESS = 1
+FRAME = 2
+END = 3
+
+BUTTONS = ("feed", "pet", "play")
+
+
+class TickClock:
+    """Wall clock that only moves with the simulation, one dt per tick"""
+
+    def __init__(self, start, dt):
+        self.start = start
+        self.dt = dt
+        self.ticks = 0
+        self.time = start
+
+    def __call__(self):
+        return self.time
+
+    def advance(self):
+        self.ticks += 1
+        # Multiply rather than accumulate so long sessions don't drift
+        self.time = self.start + self.ticks * self.dt
+
+
+class VirtualTime:
+    """Monotonic clock and wait for the GameLoop that never really sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def wait(self, timeout):
+        self.now += timeout
+
+
+def hook(pet, clock, on_press, on_frame):
+    """Drive clock from the pet's ticks and report presses and rendered frames"""
+    tick = pet.tick
+    handle_press = pet.handle_press
+    render_frame = pet.render_frame
+
+    def hooked_tick(dt):
+        clock.advance()
+        tick(dt)
+
+    def hooked_press(button):
+        on_press(clock.ticks, button)
+        handle_press(button)
+
+    def hooked_render():
+        render_frame()
+        on_frame(clock.ticks, zlib.crc32(pet.canvas.frame()))
+
+    pet.tick = hooked_tick
+    pet.handle_press = hooked_press
+    pet.render_frame = hooked_render
+
+
+class Recorder:
+    """Make a running pet deterministic and log its session to a file"""
+
+    def __init__(self, pet, path, seed=None):
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(32)
+        self.clock = TickClock(pet.clock(), pet.loop.dt)
+        pet.clock = self.clock
+        pet.rng = random.Random(self.seed)
+        # Re-anchor the stats on the tick clock so replay starts from the same state
+        pet.hunger = pet.hunger
+        pet.happiness = pet.happiness
+
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.seed, self.clock.dt, self.clock.start,
+                                    pet.hunger, pet.happiness, pet.is_sleeping,
+                                    self.clock.start - pet.last_interaction))
+        self.presses = 0
+        self.frames = 0
+        hook(pet, self.clock, self.on_press, self.on_frame)
+
+    def on_press(self, tick, button):
+        self.file.write(RECORD.pack(PRESS, tick, BUTTONS.index(button)))
+        self.presses += 1
+
+    def on_frame(self, tick, crc):
+        self.file.write(RECORD.pack(FRAME, tick, crc))
+        self.frames += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.write(RECORD.pack(END, self.clock.ticks, 0))
+        self.file.close()
+        print(f"Recorded {self.clock.ticks} ticks, {self.presses} presses, "
+              f"{self.frames} frames")
+
+
+class Session:
+    """A recorded session read back from disk"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size or not data.startswith(MAGIC):
+            raise ValueError(f"{path} is not a session recording")
+        (_, version, self.seed, self.dt, self.start, self.hunger, self.happiness,
+         sleeping, self.idle) = HEADER.unpack_from(data)
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported version {version}")
+        self.is_sleeping = bool(sleeping)
+
+        self.presses = []  # (tick, button)
+        self.frames = {}   # (tick, presses so far) -> frame CRC
+        self.end_tick = 0
+        for offset in range(HEADER.size, len(data) - RECORD.size + 1, RECORD.size):
+            kind, tick, value = RECORD.unpack_from(data, offset)
+            if kind == PRESS:
+                self.presses.append((tick, BUTTONS[value]))
+            elif kind == FRAME:
+                self.frames[(tick, len(self.presses))] = value
+            self.end_tick = tick
+            if kind == END:
+                break
+
+
+def replay(session, realtime=False, renderer="packed"):
+    """Re-run a session on a fresh simulated pet and compare every frame"""
+    oled = SimulatedSSD1306(sleep=realtime)
+    gpio = FakeGPIO()
+    clock = TickClock(session.start, session.dt)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pet = DigitalPet(oled, gpio, pipelined=False, clock=clock,
+                         rng=random.Random(session.seed), renderer=renderer)
+    if abs(pet.loop.dt - session.dt) > 1e-12:
+        raise ValueError(f"session was recorded at {1 / session.dt:g} ticks per second, "
+                         f"the pet now runs at {1 / pet.loop.dt:g}")
+    pet.hunger = session.hunger
+    pet.happiness = session.happiness
+    pet.is_sleeping = session.is_sleeping
+    pet.last_interaction = session.start - session.idle
+    pet.enable_metrics()
+
+    if not realtime:
+        virtual = VirtualTime()
+        pet.loop.clock = virtual.clock
+        pet.loop.wait = virtual.wait
+
+    # Feed each recorded press in on the tick it was handled on
+    pins = {name: pin for pin, name in pet.buttons.pins.items()}
+    presses = iter(session.presses)
+    upcoming = next(presses, None)
+    poll = pet.buttons.poll
+
+    def replay_poll():
+        nonlocal upcoming
+        while upcoming is not None and upcoming[0] <= clock.ticks:
+            pet.buttons.on_edge(pins[upcoming[1]])
+            upcoming = next(presses, None)
+        return poll()
+
+    pet.buttons.poll = replay_poll
+
+    handled = 0
+    frames = []
+
+    def on_press(tick, button):
+        nonlocal handled
+        handled += 1
+
+    def on_frame(tick, crc):
+        frames.append(((tick, handled), crc))
+
+    hook(pet, clock, on_press, on_frame)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pet.loop.run(pet.handle_buttons, pet.tick, pet.update_display,
+                     lambda: clock.ticks < session.end_tick)
+    elapsed = time.perf_counter() - start
+    stages = pet.metrics.snapshot()["stages"]
+    final = {"hunger": pet.hunger, "happiness": pet.happiness, "sleeping": pet.is_sleeping}
+    with contextlib.redirect_stdout(io.StringIO()):
+        pet.cleanup()
+
+    compared = 0
+    mismatched = 0
+    first_mismatch = None
+    digest = 0
+    for key, crc in frames:
+        digest = zlib.crc32(struct.pack("<I", crc), digest)
+        expected = session.frames.get(key)
+        if expected is None:
+            continue
+        compared += 1
+        if crc != expected:
+            mismatched += 1
+            if first_mismatch is None:
+                first_mismatch = key[0]
+
+    simulated = session.end_tick * session.dt
+    return {
+        "mode": "realtime" if realtime else "fast",
+        "renderer": renderer,
+        "ticks": clock.ticks,
+        "simulated_s": round(simulated, 3),
+        "wall_time_s": round(elapsed, 3),
+        "speedup": round(simulated / elapsed, 1) if elapsed else None,
+        "presses": handled,
+        "frames": len(frames),
+        "frames_compared": compared,
+        "frames_mismatched": mismatched,
+        "first_mismatch_tick": first_mismatch,
+        # Same session, same code and same mode give the same digest
+        "frame_digest": f"{digest:08x}",
+        "final": final,
+        "bytes_written": oled.bytes_written,
+        "stages_ms": {name: {key: stage[key] for key in ("mean_ms", "p50_ms", "p99_ms", "max_ms")}
+                      for name, stage in stages.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("session", help="file written by core.py --record")
+    parser.add_argument("--realtime", action="store_true",
+                        help="replay at the recorded speed instead of as fast as possible")
+    parser.add_argument("--renderer", choices=("packed", "pil"), default="packed",
+                        help="rendering path to replay with")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        result = replay(Session(args.session), args.realtime, args.renderer)
+    except ValueError as error:
+        sys.exit(str(error))
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if result["frames_mismatched"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
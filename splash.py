@@ -0,0 +1,49 @@
+# SSD1306 addressing commands
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
+
+# Sleeping bunny over "waking up...", pre-packed in SSD1306 page layout so it
+# can be pushed before PIL is even imported. Covers columns 34-94, pages 1-7.
+SPLASH_COLS = (34, 94)
+SPLASH_PAGES = (1, 7)
+SPLASH = bytes.fromhex(
+    "0000000000000000000000000000000000f804001ce000000080700c04f8000000000000"
+    "000000000000000000000000000000000000000000000000000000000000000000000000"
+    "000000000000010600000106000007000006010000000000000000000000000000000000"
+    "00000000000000000000000000000000000000000000000000000000007e810010100000"
+    "000080000000101000817e00000000000000000000000000000000000000000000000000"
+    "00000000000000000000000000000000000080410000c0c00000e00000c0c00000e00140"
+    "800000000000000000000000000000000000000000000000000000000000000000000000"
+    "000000000000001f60000001010000ff000001010000ff00601f00000000000000000000"
+    "000000000000000000000000000000000030c08070f000e01000a09050f00000fc40a010"
+    "0000f40000f0301010e00000e0101010f000000000f0000000f00000f0101010e0000000"
+    "000000000000000103000003010000030202030000030001020000030000030000000300"
+    "00050a0a0a0700000000010202030300000f02020201000002000002000002"
+)
+
+# Progress dots run along the top page while the rest of the app loads
+PROGRESS_COL = 34
+PROGRESS_STEP = 4
+PROGRESS_DOT = bytes([0x06, 0x06])
+
+
+def write_window(oled, cols, pages, data):
+    """Set a column/page window and write data into it"""
+    oled.write_cmd(SET_COL_ADDR)
+    oled.write_cmd(cols[0])
+    oled.write_cmd(cols[1])
+    oled.write_cmd(SET_PAGE_ADDR)
+    oled.write_cmd(pages[0])
+    oled.write_cmd(pages[1])
+    oled.write_data(data)
+
+
+def show_splash(oled):
+    """Push the splash frame straight to the panel (which init left blank)"""
+    write_window(oled, SPLASH_COLS, SPLASH_PAGES, SPLASH)
+
+
+def show_progress(oled, step):
+    """Add one more progress dot"""
+    col = PROGRESS_COL + (step % 16) * PROGRESS_STEP
+    write_window(oled, (col, col + len(PROGRESS_DOT) - 1), (0, 0), PROGRESS_DOT)
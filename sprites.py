@@ -0,0 +1,73 @@
+from PIL import Image, ImageDraw, ImageFont
+
+ZZZ_TEXT = "z Z z Z z Z"
+STATUS_LABELS = ("Hunger", "Happy")
+STATUS_RANGE = range(0, 101)
+
+
+class Sprite:
+    """A pre-rendered 1-bit bitmap of a piece of text"""
+
+    __slots__ = ("text", "image", "width", "height", "packed")
+
+    def __init__(self, text, image):
+        self.text = text
+        self.image = image
+        self.width, self.height = image.size
+        # Page-packed copies per vertical phase, filled in by FrameBuffer
+        self.packed = [None] * 8
+
+
+class SpriteAtlas:
+    """Render text once at startup and blit the bitmaps every frame after"""
+
+    def __init__(self, font=None):
+        self.font = font or ImageFont.load_default()
+        self.sprites = {}
+        self.status = {}
+
+        # Cache counters, misses should stay at zero once the atlas is built
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text):
+        """Rasterize text into a tightly sized 1-bit image"""
+        scratch = ImageDraw.Draw(Image.new("1", (1, 1)))
+        _, _, right, bottom = scratch.textbbox((0, 0), text, font=self.font)
+        image = Image.new("1", (max(1, right), max(1, bottom)))
+        ImageDraw.Draw(image).text((0, 0), text, font=self.font, fill=255)
+        return Sprite(text, image)
+
+    def add(self, text):
+        """Pre-render text into the atlas"""
+        if text not in self.sprites:
+            self.sprites[text] = self.render(text)
+        return self.sprites[text]
+
+    def build(self, frames):
+        """Pre-render bunny frames, the ZZZ strip and every status label"""
+        for frame in frames:
+            self.add(frame)
+        self.add(ZZZ_TEXT)
+        for label in STATUS_LABELS:
+            self.status[label] = [self.add(f"{label}: {value}") for value in STATUS_RANGE]
+        return self
+
+    def get(self, text):
+        """Look up a sprite, rendering it on a miss"""
+        sprite = self.sprites.get(text)
+        if sprite is None:
+            self.misses += 1
+            sprite = self.add(text)
+        else:
+            self.hits += 1
+        return sprite
+
+    def get_status(self, label, value):
+        """Look up a "Label: N" sprite without formatting a string"""
+        value = int(value)
+        labels = self.status.get(label)
+        if labels is None or value not in STATUS_RANGE:
+            return self.get(f"{label}: {value}")
+        self.hits += 1
+        return labels[value]
@@ -0,0 +1,90 @@
+"""Staged startup: get a splash on the panel first, load everything else after
+
+Only the I2C display driver is imported before the first frame, which is a
+pre-packed bitmap written straight to the controller. PIL, NumPy, GPIO and
+the pet itself are then loaded on a background thread while the main thread
+ticks progress dots, and the main loop starts as soon as they are ready.
+"""
+import time
+
+LAUNCHED = time.perf_counter()
+
+import importlib
+import sys
+import threading
+
+from cli import parse_args
+from hardware import open_display, open_gpio
+from splash import show_splash, show_progress
+
+
+class StartupTimer:
+    """Per-module import times and milestones since launch"""
+
+    def __init__(self):
+        self.imports = []
+        self.marks = []
+
+    def import_module(self, name):
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        self.imports.append((name, time.perf_counter() - start))
+        return module
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - LAUNCHED))
+
+    def report(self):
+        print("Startup timing:")
+        for name, seconds in self.imports:
+            print(f"  import {name:<20} {seconds * 1000:8.1f} ms")
+        for name, seconds in self.marks:
+            print(f"  {name:<27} {seconds * 1000:8.1f} ms after launch")
+
+
+def load(args, oled, timer, loaded):
+    """Background stage: heavy imports, GPIO and the pet itself"""
+    modules = ["numpy", "PIL.Image", "PIL.ImageDraw"]
+    if not args.simulate:
+        modules.append("RPi.GPIO")
+    for name in modules + ["core"]:
+        timer.import_module(name)
+    gpio = open_gpio(args.simulate)
+    timer.mark("gpio ready")
+    loaded.append(sys.modules["core"].create_pet(args, oled, gpio))
+
+
+def main():
+    args = parse_args()
+    timer = StartupTimer()
+
+    # Stage 1: display driver only, then the splash
+    if not args.simulate:
+        timer.import_module("board")
+        timer.import_module("adafruit_ssd1306")
+    oled = open_display(args.simulate)
+    timer.mark("display ready")
+    show_splash(oled)
+    timer.mark("first frame")
+
+    # Stage 2: everything else in the background
+    loaded = []
+    loader = threading.Thread(target=load, args=(args, oled, timer, loaded), daemon=True)
+    loader.start()
+    step = 0
+    while loader.is_alive():
+        loader.join(0.1)
+        if loader.is_alive():
+            show_progress(oled, step)
+            step += 1
+    if not loaded:
+        sys.exit("Startup failed")
+
+    pet = loaded[0]
+    timer.mark("interactive")
+    timer.report()
+    sys.modules["core"].start(pet, args)
+
+
+if __name__ == "__main__":
+    main()
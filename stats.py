@@ -0,0 +1,42 @@
+import math
+
+
+class LinearStat:
+    """A stat that decays linearly from its last change, clamped to [low, high]
+
+    Only the anchor (value and time of the last change) is stored, so reading
+    the value at any time is O(1), nothing has to be touched between
+    interactions and any amount of downtime is caught up for free.
+    """
+
+    __slots__ = ("low", "high", "rate", "value", "anchor")
+
+    def __init__(self, value, anchor, rate, low=0, high=100):
+        self.low = low
+        self.high = high
+        self.rate = rate  # units per second
+        self.set(anchor, value)
+
+    def value_at(self, now):
+        # A clock stepping backwards must not refill the stat
+        elapsed = max(0.0, now - self.anchor)
+        return max(self.low, min(self.high, self.value - self.rate * elapsed))
+
+    def time_below(self, now, level):
+        """Seconds from now until the value drops below level (math.inf if never)"""
+        value = self.value_at(now)
+        if value < level:
+            return 0.0
+        if level <= self.low or self.rate <= 0:
+            return math.inf
+        return (value - level) / self.rate
+
+    def set(self, now, value):
+        """Re-anchor at now with a new (clamped) value"""
+        self.value = max(self.low, min(self.high, value))
+        self.anchor = now
+
+
+def event_rate(chance, interval):
+    """Events per second of a Poisson process firing with chance per interval"""
+    return -math.log1p(-chance) / interval
@@ -0,0 +1,41 @@
+import contextlib
+import tracemalloc
+
+import pytest
+
+import memcheck
+
+WARMUP = 3000
+WINDOW = 1000
+
+
+def high_water(pet, scenario, start):
+    """Most memory traced at the end of any frame in a window"""
+    high = 0
+    for frame in range(start, start + WINDOW):
+        memcheck.run_frames(pet, scenario, frame, 1)
+        high = max(high, tracemalloc.get_traced_memory()[0])
+    return high
+
+
+@pytest.mark.parametrize("name", sorted(memcheck.SCENARIOS))
+def test_frames_do_not_grow_memory(name):
+    # What is alive between frames depends on where the animations are, so
+    # compare the high-water marks of two windows rather than two instants;
+    # a leak of even one small object per frame lifts the second by kilobytes
+    pet = memcheck.build()
+    scenario = memcheck.SCENARIOS[name]
+    with contextlib.redirect_stdout(memcheck.Discard()):
+        tracemalloc.start(1)
+        try:
+            memcheck.run_frames(pet, scenario, 0, WARMUP)
+            first = high_water(pet, scenario, WARMUP)
+            second = high_water(pet, scenario, WARMUP + WINDOW)
+        finally:
+            tracemalloc.stop()
+    assert second - first < WINDOW
+
+
+@pytest.mark.parametrize("name", sorted(memcheck.SCENARIOS))
+def test_frames_trigger_no_collections(name):
+    assert memcheck.gc_pauses(name, WINDOW)["collections"] == 0
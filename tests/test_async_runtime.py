@@ -0,0 +1,25 @@
+import threading
+
+from async_runtime import AsyncRuntime
+from core import DigitalPet
+from hardware import SimulatedSSD1306, FakeGPIO
+
+
+def test_runtime_stops_cleanly(capsys):
+    oled = SimulatedSSD1306(sleep=False)
+    pet = DigitalPet(oled, FakeGPIO(), pipelined=False)
+    runtime = AsyncRuntime(pet)
+    # The stats task notices the pet stopped running and stops the runtime
+    stopper = threading.Timer(0.5, setattr, (pet, "running", False))
+    stopper.start()
+    runtime.run()
+    stopper.join()
+
+    out = capsys.readouterr().out
+    assert runtime.ticks > 0 and runtime.frames > 0
+    assert all(task.done() for task in runtime.tasks)
+    assert pet.buttons.notify is None
+    # Cleanup ran, and reported the runtime's counters instead of the unused loop's
+    assert bytes(oled.ram) == bytes(len(oled.ram))
+    assert "Runtime:" in out and "Goodbye!" in out
+    assert "Loop:" not in out
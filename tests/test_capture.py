@@ -0,0 +1,91 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from capture import KEYFRAME_INTERVAL, MAX_RUN, SLOTS, Capture, FrameCapture, decode, encode
+
+PAGES, WIDTH = 8, 128
+START = 1_700_000_000.0
+
+
+def round_trip(delta):
+    data = bytes(encode(delta))
+    frame = np.zeros_like(delta)
+    decode(data, 0, len(data), frame)
+    return frame
+
+
+def test_random_sparse_deltas_round_trip():
+    rng = np.random.default_rng(3)
+    for _ in range(500):
+        delta = np.zeros(PAGES * WIDTH, dtype=np.uint8)
+        for _ in range(rng.integers(0, 8)):
+            start = rng.integers(0, len(delta))
+            # Runs longer than one token, and gaps small enough to merge over
+            length = rng.integers(1, 3 * MAX_RUN)
+            delta[start:start + length] = rng.integers(0, 256, len(delta[start:start + length]))
+        assert np.array_equal(round_trip(delta), delta)
+
+
+@pytest.mark.parametrize("fill", ["empty", "full", "ends"])
+def test_edge_deltas_round_trip(fill):
+    delta = np.zeros(PAGES * WIDTH, dtype=np.uint8)
+    if fill == "full":
+        delta[:] = 0xFF
+    elif fill == "ends":
+        delta[0] = delta[-1] = 1
+    assert np.array_equal(round_trip(delta), delta)
+
+
+def capture_frames(tmp_path, seconds, step):
+    """Write a frame every step seconds, some of them repeats, and return
+    the (ms, frame) on screen at each step"""
+    rng = np.random.default_rng(4)
+    path = os.path.join(tmp_path, "pet.cap")
+    capture = FrameCapture(path, WIDTH, PAGES * 8, START)
+    frame = np.zeros((PAGES, WIDTH), dtype=np.uint8)
+    shown = []
+    for tick in range(int(seconds / step)):
+        if tick % 3:
+            page, col = rng.integers(0, PAGES), rng.integers(0, WIDTH - 16)
+            frame[page, col:col + 16] = rng.integers(0, 256, 16)
+        shown.append((round(tick * step * 1000), frame.copy()))
+        capture.add(START + tick * step, frame)
+        # Frames added faster than they are written get dropped by design
+        while capture.queue.qsize() > SLOTS // 2:
+            time.sleep(0.001)
+    capture.close()
+    assert capture.dropped == 0
+    return path, shown
+
+
+def assert_replays(capture, shown, start=0):
+    """The frames read from start on show what was on screen at each step"""
+    read = [(ms, frame.copy()) for ms, frame in capture.frames(start)]
+    assert read[0][0] <= start
+    position = 0
+    for ms, frame in shown:
+        if ms < start:
+            continue
+        while position + 1 < len(read) and read[position + 1][0] <= ms:
+            position += 1
+        assert np.array_equal(read[position][1], frame), ms
+
+
+def test_capture_replays_every_frame(tmp_path):
+    path, shown = capture_frames(tmp_path, 3 * KEYFRAME_INTERVAL, 0.5)
+    capture = Capture(path)
+    assert len(capture.keys) == 3
+    assert_replays(capture, shown)
+
+
+@pytest.mark.parametrize("index", [True, False])
+def test_seek_starts_from_the_frame_on_screen(tmp_path, index):
+    path, shown = capture_frames(tmp_path, 3 * KEYFRAME_INTERVAL, 0.5)
+    if not index:
+        # Without the sidecar the segments are scanned for keyframes instead
+        os.remove(path + ".idx")
+    capture = Capture(path)
+    assert_replays(capture, shown, 2 * KEYFRAME_INTERVAL * 1000 + 1250)
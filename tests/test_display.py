@@ -0,0 +1,66 @@
+import numpy as np
+
+from display import DeltaDisplay, FramePipeline, dirty_windows
+from hardware import SimulatedSSD1306
+
+PAGES, WIDTH = 8, 128
+
+
+def sparse_change(rng, frame):
+    """A copy of frame with a few small random patches redrawn"""
+    changed = frame.copy()
+    for _ in range(rng.integers(0, 6)):
+        page = rng.integers(0, PAGES)
+        col = rng.integers(0, WIDTH)
+        changed[page:page + rng.integers(1, 3), col:col + rng.integers(1, 20)] = rng.integers(0, 256)
+    return changed
+
+
+def test_windows_cover_every_change():
+    rng = np.random.default_rng(1)
+    last = rng.integers(0, 256, (PAGES, WIDTH), dtype=np.uint8)
+    for _ in range(500):
+        frame = sparse_change(rng, last)
+        applied = last.copy()
+        for col_start, col_end, page_start, page_end in dirty_windows(frame, last):
+            applied[page_start:page_end + 1, col_start:col_end + 1] = \
+                frame[page_start:page_end + 1, col_start:col_end + 1]
+        assert np.array_equal(applied, frame)
+        last = frame
+
+
+def test_identical_frames_need_no_windows():
+    frame = np.full((PAGES, WIDTH), 0x55, dtype=np.uint8)
+    assert dirty_windows(frame, frame.copy()) == []
+
+
+def test_windows_merge_only_when_cheaper():
+    last = np.zeros((PAGES, WIDTH), dtype=np.uint8)
+    # Same columns on neighbouring pages: one window beats two
+    frame = last.copy()
+    frame[2:4, 10:20] = 1
+    assert dirty_windows(frame, last) == [(10, 19, 2, 3)]
+    # Opposite corners: one window would resend most of the screen
+    frame = last.copy()
+    frame[0, 0] = frame[7, 127] = 1
+    assert dirty_windows(frame, last) == [(0, 0, 0, 0), (127, 127, 7, 7)]
+
+
+def test_panel_ends_up_showing_each_frame():
+    rng = np.random.default_rng(2)
+    oled = SimulatedSSD1306(sleep=False)
+    display = DeltaDisplay(oled)
+    frame = np.zeros((PAGES, WIDTH), dtype=np.uint8)
+    for _ in range(200):
+        frame = sparse_change(rng, frame)
+        display.show_frame(frame)
+        assert bytes(oled.ram) == frame.tobytes()
+
+
+def test_pipeline_stop_delivers_the_last_frame():
+    oled = SimulatedSSD1306(sleep=False)
+    pipeline = FramePipeline(DeltaDisplay(oled))
+    for value in range(1, 50):
+        pipeline.submit(np.full((PAGES, WIDTH), value, dtype=np.uint8))
+    pipeline.stop()
+    assert bytes(oled.ram) == bytes([49]) * (PAGES * WIDTH)
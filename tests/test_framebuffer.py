@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+from PIL import Image
+
+from display import pack_image
+from framebuffer import FrameBuffer, ImageCanvas, pack_phases, unpack_image
+from sprites import Sprite
+
+WIDTH, HEIGHT = 128, 64
+
+
+def random_image(rng, width, height, density=0.5):
+    bits = np.array([[rng.random() < density for _ in range(width)] for _ in range(height)])
+    return Image.fromarray(bits.astype(np.uint8) * 255).convert("1")
+
+
+def reference_pack(image):
+    """Page layout the slow way: bit k of [page, x] is pixel (x, page * 8 + k)"""
+    bits = np.array(image, dtype=bool)
+    height, width = bits.shape
+    pages = np.zeros((height // 8, width), dtype=np.uint8)
+    for y in range(height):
+        pages[y // 8] |= bits[y].astype(np.uint8) << (y % 8)
+    return pages
+
+
+def test_pack_image_matches_page_layout():
+    rng = random.Random(1)
+    image = random_image(rng, WIDTH, HEIGHT)
+    assert np.array_equal(pack_image(image), reference_pack(image))
+    out = np.zeros((HEIGHT // 8, WIDTH), dtype=np.uint8)
+    assert pack_image(image, out=out) is out
+    assert np.array_equal(out, reference_pack(image))
+
+
+def test_pack_phases_shifts_rows_down():
+    rng = random.Random(2)
+    image = random_image(rng, 13, 11)
+    for shift in range(8):
+        padded = Image.new("1", (13, (11 + shift + 7) // 8 * 8))
+        padded.paste(image, (0, shift))
+        assert np.array_equal(pack_phases(image, shift), reference_pack(padded))
+
+
+def test_unpack_image_round_trips():
+    rng = random.Random(3)
+    image = random_image(rng, WIDTH, HEIGHT)
+    assert np.array_equal(np.array(unpack_image(pack_image(image))), np.array(image))
+
+
+def test_framebuffer_matches_pil_canvas():
+    rng = random.Random(4)
+    sprites = [Sprite(str(i), random_image(rng, rng.randint(1, 40), rng.randint(1, 24)))
+               for i in range(12)]
+    packed = FrameBuffer(WIDTH, HEIGHT)
+    pil = ImageCanvas(WIDTH, HEIGHT)
+    for _ in range(2000):
+        if rng.random() < 0.3:
+            x0, x1 = sorted(rng.sample(range(WIDTH + 1), 2))
+            y0, y1 = sorted(rng.sample(range(HEIGHT + 1), 2))
+            packed.clear_rect((x0, y0, x1, y1))
+            pil.clear_rect((x0, y0, x1, y1))
+        else:
+            # Partly and wholly off-screen positions exercise the clipping
+            sprite = rng.choice(sprites)
+            position = (rng.randint(-50, WIDTH + 10), rng.randint(-30, HEIGHT + 10))
+            packed.blit(sprite, position)
+            pil.blit(sprite, position)
+        if rng.random() < 0.01:
+            packed.clear()
+            pil.clear()
+        assert np.array_equal(packed.frame(), pil.frame())
@@ -0,0 +1,64 @@
+import numpy as np
+
+from display import DeltaDisplay
+from hardware import MuxChannel, SimulatedMux, SimulatedSSD1306
+from multipet import BusScheduler
+
+PAGES, WIDTH = 8, 128
+
+
+def frame(value):
+    return np.full((PAGES, WIDTH), value, dtype=np.uint8)
+
+
+def test_bus_round_order_drops_and_switches():
+    mux = SimulatedMux(sleep=False)
+    scheduler = BusScheduler(mux)
+    panels = []
+    ports = []
+    sent = []
+    for channel in (0, 1, 2, 1):
+        panel = SimulatedSSD1306(sleep=False)
+        display = DeltaDisplay(MuxChannel(panel, mux, channel))
+
+        def show_frame(data, changed=True, display=display, channel=channel):
+            sent.append(channel)
+            return DeltaDisplay.show_frame(display, data, changed)
+
+        display.show_frame = show_frame
+        panels.append(panel)
+        ports.append(scheduler.port(display, channel))
+    mux.select(2)
+    switches = mux.switches
+
+    # Holding the scheduler's lock keeps the writer out until every frame
+    # is queued, so they all go in one round
+    with scheduler.changed:
+        for index, port in enumerate(ports):
+            port.submit(frame(index + 1))
+        # A newer frame replaces the one still waiting
+        ports[0].submit(frame(9))
+    with scheduler.changed:
+        scheduler.changed.wait_for(lambda: scheduler.rounds == 1, timeout=5.0)
+    scheduler.stop()
+
+    # The selected channel first, then by channel, at most one switch each
+    assert sent == [2, 0, 1, 1]
+    assert mux.switches - switches == 2
+    assert ports[0].dropped == 1 and ports[0].transferred == 1
+    assert [port.transferred for port in ports] == [1, 1, 1, 1]
+    assert bytes(panels[0].ram) == frame(9).tobytes()
+    for index, panel in enumerate(panels[1:], 2):
+        assert bytes(panel.ram) == frame(index).tobytes()
+
+
+def test_identical_frames_are_skipped():
+    mux = SimulatedMux(sleep=False)
+    scheduler = BusScheduler(mux)
+    port = scheduler.port(DeltaDisplay(MuxChannel(SimulatedSSD1306(sleep=False), mux, 0)), 0)
+    port.submit(frame(1))
+    port.submit(frame(1))
+    port.submit(frame(1), changed=False)
+    scheduler.stop()
+    assert port.rendered == 1 and port.skipped == 2
+    assert port.transferred == 1
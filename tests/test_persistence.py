@@ -0,0 +1,75 @@
+import threading
+import time
+
+from persistence import RECORD_SIZE, PetState, StateStore, pack_record, EVENTS
+
+
+def write_journal(store, data):
+    with open(store.journal_path, "wb") as f:
+        f.write(data)
+
+
+def reload(store, tmp_path):
+    """Stop store and read its state back with a fresh one"""
+    store.queue.put(("stop", None))
+    store.thread.join()
+    return StateStore(tmp_path).load()
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    store = StateStore(tmp_path)
+    good = pack_record(EVENTS["feed"], PetState(100.0, 50, 60, 90.0, False))
+    write_journal(store, good + good[:7])
+    assert store.load().hunger == 50
+    store.start()
+    assert store.journal_size == RECORD_SIZE
+    store.append("pet", PetState(200.0, 40, 75, 200.0, False))
+    state = reload(store, tmp_path)
+    assert (state.timestamp, state.hunger, state.happiness) == (200.0, 40, 75)
+
+
+def test_corrupt_record_is_dropped(tmp_path):
+    # A full-size but zero-filled block, as a power cut can leave behind
+    store = StateStore(tmp_path)
+    good = pack_record(EVENTS["feed"], PetState(100.0, 50, 60, 90.0, False))
+    write_journal(store, good + bytes(RECORD_SIZE) + good)
+    assert store.load().timestamp == 100.0
+    store.start()
+    assert store.journal_size == RECORD_SIZE
+    store.append("pet", PetState(200.0, 40, 75, 200.0, False))
+    state = reload(store, tmp_path)
+    assert (state.timestamp, state.hunger, state.happiness) == (200.0, 40, 75)
+
+
+def test_full_journal_queues_one_snapshot(tmp_path):
+    store = StateStore(tmp_path, max_journal=2 * RECORD_SIZE)
+    store.load()
+    store.start()
+    # Hold the writer inside its snapshot, as a slow fsync would
+    release = threading.Event()
+    write_snapshot = store.write_snapshot
+
+    def slow_write_snapshot(record):
+        release.wait(5.0)
+        write_snapshot(record)
+
+    store.write_snapshot = slow_write_snapshot
+    state = PetState(100.0, 50, 60, 90.0, False)
+    store.append("feed", state)
+    store.append("pet", state)
+    deadline = time.monotonic() + 5.0
+    while store.journal_size < store.max_journal and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    queued = 0
+    for _ in range(100):
+        # What the pet does every tick
+        if store.snapshot_due():
+            store.snapshot(state)
+            queued += 1
+    assert queued == 1
+    assert store.snapshot_delay() > 0
+    release.set()
+    reload(store, tmp_path)
+    assert store.snapshots == 1
+    assert not store.snapshot_pending and not store.snapshot_due()
@@ -0,0 +1,49 @@
+import numpy as np
+
+from popsim import BUTTONS, Params, Population
+
+
+def press_one_by_one(hunger, happiness, sleeping, presses, params):
+    """handle_press's rules, one press at a time, for one pet"""
+    for button in presses:
+        if sleeping:
+            sleeping = False
+            continue
+        if button == "feed":
+            hunger = min(100, hunger + params.feed)
+        elif button == "pet":
+            happiness = min(100, happiness + params.pet)
+        else:
+            hunger = max(0, hunger - params.play_hunger)
+            happiness = min(100, happiness + params.play_happiness)
+    return hunger, happiness
+
+
+def test_presses_clamp_after_each_one():
+    rng = np.random.default_rng(8)
+    params = Params()
+    population = Population(200, params, seed=0)
+    # Near the limits, so stats saturate partway through a pet's presses
+    population.hunger[:] = rng.choice([0, 2, 50, 90, 98, 100], 200)
+    population.happiness[:] = rng.choice([0, 80, 95, 100], 200)
+    population.sleeping[:] = rng.random(200) < 0.3
+    before = (population.hunger.copy(), population.happiness.copy(), population.sleeping.copy())
+
+    pressed = rng.integers(0, 200, 800)
+    buttons = rng.integers(0, len(BUTTONS), 800)
+    population.apply_presses(pressed, buttons)
+
+    for pet in range(200):
+        presses = [BUTTONS[button] for button in buttons[pressed == pet]]
+        expected = press_one_by_one(float(before[0][pet]), float(before[1][pet]),
+                                    bool(before[2][pet]), presses, params)
+        assert (population.hunger[pet], population.happiness[pet]) == expected, pet
+        if presses:
+            assert population.idle[pet] == 0
+
+
+def test_feed_then_play_at_full_hunger():
+    # Summing first would give 100 + 15 - 5 -> 100; one by one it is 95
+    population = Population(1, Params(), seed=0)
+    population.apply_presses(np.array([0, 0]), np.array([BUTTONS.index("feed"), BUTTONS.index("play")]))
+    assert population.hunger[0] == 95
@@ -0,0 +1,108 @@
+import random
+
+import numpy as np
+from PIL import Image
+
+from framebuffer import FrameBuffer
+from scene import PelletLayer, Scene, SpriteWidget, merge_rects, overlaps
+from sprites import Sprite
+
+WIDTH, HEIGHT = 128, 64
+
+
+def random_sprite(rng, name):
+    width, height = rng.randint(1, 30), rng.randint(1, 20)
+    bits = np.array([[rng.random() < 0.5 for _ in range(width)] for _ in range(height)])
+    return Sprite(name, Image.fromarray(bits.astype(np.uint8) * 255).convert("1"))
+
+
+class Pellets:
+    """Just enough of a PelletPool for a PelletLayer: a sprite and positions"""
+
+    def __init__(self, rng):
+        self.sprite = random_sprite(rng, "pellet").image
+        self.version = 0
+        self.moved_to = []
+
+    def move(self, positions):
+        self.moved_to = positions
+        self.version += 1
+
+    def positions(self):
+        return list(self.moved_to)
+
+
+def pixels(canvas):
+    """The canvas as a height x width bool array"""
+    frame = canvas.frame()
+    rows = np.unpackbits(frame[:, np.newaxis, :], axis=1, bitorder="little")
+    return rows.reshape(HEIGHT, WIDTH).astype(bool)
+
+
+def full_redraw(widgets):
+    canvas = FrameBuffer(WIDTH, HEIGHT)
+    canvas.clear()
+    for widget in widgets:
+        if widget.bbox() is not None:
+            widget.draw(canvas)
+    return pixels(canvas)
+
+
+def test_merged_rects_cover_their_inputs_and_stay_apart():
+    rng = random.Random(5)
+    for _ in range(500):
+        rects = []
+        for _ in range(rng.randint(0, 10)):
+            x, y = rng.randint(0, WIDTH - 1), rng.randint(0, HEIGHT - 1)
+            rects.append((x, y, x + rng.randint(1, 30), y + rng.randint(1, 20)))
+        merged = merge_rects(rects)
+        for rect in rects:
+            assert any(m[0] <= rect[0] and m[1] <= rect[1] and rect[2] <= m[2] and rect[3] <= m[3]
+                       for m in merged)
+        for index, a in enumerate(merged):
+            for b in merged[index + 1:]:
+                assert not overlaps(a, b)
+
+
+def test_overlapping_and_adjacent_rects_merge():
+    assert merge_rects([(0, 0, 10, 10), (5, 5, 20, 20)]) == [(0, 0, 20, 20)]
+    # Sharing an edge, side by side and one above the other
+    assert merge_rects([(0, 0, 5, 8), (5, 0, 9, 8)]) == [(0, 0, 9, 8)]
+    assert merge_rects([(0, 0, 5, 4), (0, 4, 5, 8)]) == [(0, 0, 5, 8)]
+    # A merge that grows into a third rectangle takes that one too
+    assert merge_rects([(0, 0, 4, 4), (20, 0, 24, 4), (4, 0, 20, 2)]) == [(0, 0, 24, 4)]
+    # Meeting only at a corner, or apart, stays separate
+    assert len(merge_rects([(0, 0, 5, 5), (5, 5, 10, 10)])) == 2
+    assert len(merge_rects([(0, 0, 5, 5), (6, 0, 10, 5)])) == 2
+
+
+def test_incremental_compose_matches_full_redraw():
+    rng = random.Random(6)
+    sprites = [random_sprite(rng, str(index)) for index in range(6)]
+    canvas = FrameBuffer(WIDTH, HEIGHT)
+    scene = Scene(canvas)
+    widgets = [scene.add(SpriteWidget()) for _ in range(5)]
+    pellets = Pellets(rng)
+    widgets.append(scene.add(PelletLayer(pellets)))
+    previous = full_redraw(widgets)
+    for step in range(1000):
+        for _ in range(rng.randint(0, 3)):
+            widget = rng.choice(widgets)
+            if widget is widgets[-1]:
+                pellets.move([(rng.randint(-10, WIDTH), rng.randint(-10, HEIGHT))
+                              for _ in range(rng.randint(0, 4))])
+                widget.update()
+            elif rng.random() < 0.2:
+                widget.hide()
+            else:
+                widget.show(rng.choice(sprites), rng.randint(-20, WIDTH), rng.randint(-15, HEIGHT))
+        rects = scene.compose()
+        expected = full_redraw(widgets)
+        assert np.array_equal(pixels(canvas), expected), step
+
+        # Every pixel that changed lies inside the damage reported
+        covered = np.zeros((HEIGHT, WIDTH), dtype=bool)
+        for x0, y0, x1, y1 in rects:
+            covered[y0:y1, x0:x1] = True
+        assert not (expected != previous)[~covered].any(), step
+        previous = expected
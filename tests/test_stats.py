@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+from stats import LinearStat, event_rate
+
+
+def test_value_decays_linearly_from_the_anchor():
+    stat = LinearStat(80, 100.0, 0.5)
+    assert stat.value_at(100.0) == 80
+    assert stat.value_at(120.0) == pytest.approx(70)
+
+
+def test_value_is_clamped():
+    stat = LinearStat(150, 0.0, 1.0)
+    assert stat.value_at(0.0) == 100
+    assert stat.value_at(1000.0) == 0
+    stat.set(10.0, -5)
+    assert stat.value_at(10.0) == 0
+
+
+def test_clock_stepping_back_does_not_refill():
+    stat = LinearStat(50, 100.0, 1.0)
+    assert stat.value_at(40.0) == 50
+
+
+def test_set_reanchors():
+    stat = LinearStat(100, 0.0, 1.0)
+    stat.set(30.0, stat.value_at(30.0) + 10)
+    assert stat.value_at(30.0) == 80
+    assert stat.value_at(40.0) == pytest.approx(70)
+
+
+def test_time_below():
+    stat = LinearStat(80, 0.0, 2.0)
+    assert stat.time_below(0.0, 60) == pytest.approx(10.0)
+    assert stat.time_below(5.0, 60) == pytest.approx(5.0)
+    # Crossing it at the returned time, not before
+    assert stat.value_at(10.0) == pytest.approx(60)
+    assert stat.time_below(20.0, 60) == 0.0
+    # The floor is never dropped below, and a stat that doesn't decay never drops
+    assert stat.time_below(0.0, 0) == math.inf
+    assert LinearStat(80, 0.0, 0.0).time_below(0.0, 60) == math.inf
+
+
+def test_event_rate_matches_per_interval_chance():
+    rate = event_rate(0.01, 0.1)
+    assert 1 - math.exp(-rate * 0.1) == pytest.approx(0.01)
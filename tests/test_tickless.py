@@ -0,0 +1,109 @@
+import contextlib
+import io
+import zlib
+
+import pytest
+
+from animations import BUNNY_ANIMATIONS, pellet_flight
+from core import DigitalPet
+from hardware import SimulatedSSD1306, FakeGPIO
+from timeline import Animation, Key, Timeline
+
+TICK = 0.1
+START = 1000.0
+DURATION = 600.0
+# Presses (seconds into the run) covering a feed, a pet during the pellet
+# flight, a play, and a pet and feed landing between ticks
+PRESSES = [(30.0, "feed"), (31.3, "pet"), (200.0, "play"), (400.05, "pet"), (401.0, "feed")]
+
+CLIPS = BUNNY_ANIMATIONS + (pellet_flight(128, 64), Animation("still", 1.0, loop=True, frame=[Key(0.0, 0)]))
+
+
+def started(animation, index):
+    timeline = Timeline(TICK).load(animation)
+    player = timeline.play(animation.name)
+    player.index = index
+    timeline.dirty = False
+    return timeline, player
+
+
+@pytest.mark.parametrize("animation", CLIPS, ids=lambda animation: animation.name)
+def test_quiet_ticks_match_stepping(animation):
+    length = animation.compile(TICK).length
+    for index in range(length):
+        timeline, player = started(animation, index)
+        quiet = timeline.quiet_ticks()
+        steps = 0
+        while steps < 2 * length and not timeline.step():
+            steps += 1
+        if steps == 2 * length:
+            steps = float("inf")
+        assert quiet == steps, index
+
+
+@pytest.mark.parametrize("animation", CLIPS, ids=lambda animation: animation.name)
+def test_skip_matches_repeated_steps(animation):
+    length = animation.compile(TICK).length
+    for index in range(length):
+        skipped, skipping = started(animation, index)
+        stepped, stepping = started(animation, index)
+        count = min(skipped.quiet_ticks(), 3 * length)
+        skipped.skip(count)
+        for _ in range(count):
+            stepped.step()
+        assert skipping.index == stepping.index, index
+
+
+def run(tickless):
+    """Distinct frames of a run on a virtual clock, as (seconds, crc)"""
+    now = [START]
+    with contextlib.redirect_stdout(io.StringIO()):
+        pet = DigitalPet(SimulatedSSD1306(sleep=False), FakeGPIO(), pipelined=False,
+                         clock=lambda: now[0])
+    pet.RANDOM_EVENT_CHANCE = 0.0
+    pet.hunger = 80.5
+    pet.happiness = 77.2
+    pet.loop.clock = lambda: now[0]
+    pins = {name: pin for pin, name in pet.buttons.pins.items()}
+    presses = [(START + offset, name) for offset, name in PRESSES]
+
+    def wait(timeout):
+        # A press due before the timeout wakes the loop at its time
+        end = now[0] + timeout
+        if presses and presses[0][0] <= end:
+            at, name = presses.pop(0)
+            now[0] = max(now[0], at)
+            pet.buttons.on_edge(pins[name])
+        else:
+            now[0] = end
+
+    pet.loop.wait = wait
+    if tickless:
+        pet.enable_tickless()
+    frames = []
+    update_display = pet.update_display
+
+    def recorded():
+        update_display()
+        crc = zlib.crc32(pet.canvas.frame())
+        if not frames or frames[-1][1] != crc:
+            frames.append((now[0] - START, crc))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pet.loop.run(pet.handle_buttons, pet.tick, recorded,
+                     lambda: now[0] < START + DURATION)
+    return pet, frames
+
+
+def test_tickless_shows_the_same_frames():
+    polled, polled_frames = run(False)
+    tickless, tickless_frames = run(True)
+    assert [crc for _, crc in tickless_frames] == [crc for _, crc in polled_frames]
+    # Never later than polling would have drawn it
+    assert all(late <= early + 1e-6
+               for (early, _), (late, _) in zip(polled_frames, tickless_frames))
+    assert tickless.is_sleeping == polled.is_sleeping
+    assert tickless.hunger == pytest.approx(polled.hunger)
+    # And it actually slept through most of the ticks
+    assert tickless.loop.skipped_ticks > tickless.loop.ticks / 2
+    assert tickless.loop.wakeups < polled.loop.wakeups / 2
@@ -0,0 +1,215 @@
+"""Keyframe animations compiled to per-tick lookup tables
+
+An Animation declares one track of keys per channel; each key is a value
+reached at a time, eased in from the key before it. Loading an animation
+into a Timeline samples every channel once per tick up front, so playing
+it is an index into a table per tick, with no easing math and no threads
+however many animations are declared.
+"""
+import math
+
+import numpy as np
+
+# Key times closer than this to a sample count as reached
+EPSILON = 1e-9
+
+
+def linear(p):
+    return p
+
+
+def ease_in(p):
+    return p * p
+
+
+def ease_out(p):
+    return p * (2 - p)
+
+
+def ease_in_out(p):
+    if p < 0.5:
+        return 2 * p * p
+    return 1 - 2 * (1 - p) * (1 - p)
+
+
+def step(p):
+    """Hold the previous value until the key's time, then jump"""
+    return 1.0 if p >= 1 - EPSILON else 0.0
+
+
+def steps(count):
+    """Move in count equal jumps between keys"""
+    def stepped(p):
+        return math.floor(p * count + EPSILON) / count
+    return stepped
+
+
+class Key:
+    """A value reached at a time, eased in from the previous key"""
+
+    def __init__(self, time, value, easing=linear):
+        self.time = time
+        self.value = value
+        self.easing = easing
+
+
+def sample(keys, t):
+    """A track's value at time t, holding its end values outside the keys"""
+    if t <= keys[0].time:
+        return keys[0].value
+    for before, after in zip(keys, keys[1:]):
+        if t < after.time - EPSILON:
+            p = (t - before.time) / (after.time - before.time)
+            return before.value + (after.value - before.value) * after.easing(p)
+    return keys[-1].value
+
+
+class Animation:
+    """A named set of keyframe tracks, one per channel
+
+    duration is when the animation ends (a looping one starts over there);
+    the tick on which it ends is not sampled.
+    """
+
+    def __init__(self, name, duration, loop=False, **tracks):
+        self.name = name
+        self.duration = duration
+        self.loop = loop
+        self.tracks = tracks
+
+    def compile(self, dt):
+        """Sample every track once per tick into a Clip"""
+        length = max(1, math.ceil(self.duration / dt - EPSILON))
+        tables = {channel: [float(sample(keys, index * dt)) for index in range(length)]
+                  for channel, keys in self.tracks.items()}
+        return Clip(self.name, length, self.loop, tables)
+
+
+class Clip:
+    """An animation sampled at a fixed tick: one table of values per channel
+
+    tables hold Python floats for single lookups, arrays the same values
+    for vectorized users (the pellet pool), and changes[i] says whether any
+    channel differs at tick i from the tick before, so a player knows when
+    a redraw is due without comparing values. quiet[i] counts the steps
+    from tick i that change nothing, for a loop that wants to sleep through
+    them (math.inf for a loop that never changes).
+    """
+
+    def __init__(self, name, length, loop, tables):
+        self.name = name
+        self.length = length
+        self.loop = loop
+        self.tables = tables
+        self.arrays = {channel: np.array(values, dtype=np.float32)
+                       for channel, values in tables.items()}
+        self.changes = [False] * length
+        for index in range(length):
+            # A loop's first tick follows its last one
+            if index == 0 and not loop:
+                continue
+            self.changes[index] = any(values[index] != values[index - 1]
+                                      for values in tables.values())
+        self.quiet = [0] * length
+        if loop and not any(self.changes):
+            self.quiet = [math.inf] * length
+        elif loop:
+            # Twice round, so every tick sees the next change even past the end
+            run = 0
+            for index in range(2 * length - 1, -1, -1):
+                self.quiet[index % length] = run
+                run = 0 if self.changes[index % length] else run + 1
+        else:
+            # Stepping off the last tick ends the clip, which counts as a change
+            for index in range(length - 2, -1, -1):
+                self.quiet[index] = 0 if self.changes[index + 1] else self.quiet[index + 1] + 1
+
+
+class Player:
+    """One running instance of a clip"""
+
+    __slots__ = ("clip", "index", "loop", "done")
+
+    def __init__(self, clip, loop):
+        self.clip = clip
+        self.index = 0
+        self.loop = loop
+        self.done = False
+
+    def value(self, channel, default=0.0):
+        """The channel's value at the current tick"""
+        table = self.clip.tables.get(channel)
+        if table is None:
+            return default
+        return table[self.index]
+
+
+class Timeline:
+    """The loaded clips and the players currently running them
+
+    step() advances every running player by one tick, so a tick costs one
+    table lookup per active animation.
+    """
+
+    def __init__(self, dt):
+        self.dt = dt
+        self.clips = {}
+        self.active = []
+        # A player started or stopped since the last step
+        self.dirty = False
+
+    def load(self, *animations):
+        """Compile animations into clips, once, at startup"""
+        for animation in animations:
+            self.clips[animation.name] = animation.compile(self.dt)
+        return self
+
+    def play(self, name, loop=None):
+        """Start a loaded clip from its first tick"""
+        clip = self.clips[name]
+        player = Player(clip, clip.loop if loop is None else loop)
+        self.active.append(player)
+        self.dirty = True
+        return player
+
+    def stop(self, player):
+        """Stop a player early (stopping one that already ended is fine)"""
+        if player is None or player.done:
+            return
+        player.done = True
+        self.active.remove(player)
+        self.dirty = True
+
+    def quiet_ticks(self):
+        """How many steps from now change nothing on screen"""
+        if self.dirty:
+            return 0
+        return min((player.clip.quiet[player.index] for player in self.active),
+                   default=math.inf)
+
+    def skip(self, count):
+        """Advance every player count ticks at once, at most quiet_ticks()"""
+        for player in self.active:
+            index = player.index + count
+            player.index = index % player.clip.length if player.loop else index
+
+    def step(self):
+        """Advance every player a tick; whether anything on screen changed"""
+        changed = self.dirty
+        self.dirty = False
+        index = len(self.active) - 1
+        while index >= 0:
+            player = self.active[index]
+            player.index += 1
+            if player.index >= player.clip.length:
+                if player.loop:
+                    player.index = 0
+                else:
+                    # Stay on the last tick, so a finished pose holds
+                    player.index = player.clip.length - 1
+                    player.done = True
+                    del self.active[index]
+                    changed = True
+            changed = changed or player.clip.changes[player.index]
+            index -= 1
+        return changed